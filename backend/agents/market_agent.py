@@ -1,14 +1,14 @@
 import os
+import heapq
 import yfinance as yf
 import requests
 from typing import Dict, List, Optional, Any
-from datetime import datetime
+from datetime import datetime, timezone
 from decimal import Decimal
 import boto3
 import time
-import random
-from strands import Agent
-from strands.models import BedrockModel
+from collections import Counter
+from operator import itemgetter
 
 
 def convert_decimal_to_float(obj):
@@ -23,15 +23,540 @@ def convert_decimal_to_float(obj):
         return obj
 
 
+# ==================== INDIAN MARKET SYMBOLS ====================
+
+# Common NSE/BSE stocks quoted without an exchange suffix
+INDIAN_STOCK_SYMBOLS = frozenset({
+    'RELIANCE', 'TCS', 'INFY', 'HDFCBANK', 'ICICIBANK',
+    'SBIN', 'BHARTIARTL', 'ITC', 'KOTAKBANK', 'LT',
+    'AXISBANK', 'HINDUNILVR', 'BAJFINANCE', 'ASIANPAINT',
+    'MARUTI', 'TITAN', 'WIPRO', 'ULTRACEMCO', 'SUNPHARMA',
+    'NESTLEIND', 'HCLTECH', 'TECHM', 'TATAMOTORS', 'ADANIPORTS',
+    'POWERGRID', 'ONGC', 'NTPC', 'COALINDIA', 'DRREDDY', 'CIPLA'
+})
+
+
+# ==================== FALLBACK MARKET DATA ====================
+# Built once at import; _get_fallback_data only reads these tables.
+
+# ETF Fallback Data - Common US ETFs
+ETF_FALLBACKS = {
+    'SPY': {
+        'currentPrice': 445.0,
+        'sector': 'ETF - Large Cap',
+        'industry': 'Index Fund',
+        'beta': 1.0,
+        'week52High': 470.0,
+        'week52Low': 380.0,
+        'dayChange': 2.5,
+        'dayChangePct': 0.56,
+        'dividendYield': 1.3,
+        'ytdReturn': 12.5
+    },
+    'QQQ': {
+        'currentPrice': 385.0,
+        'sector': 'ETF - Technology',
+        'industry': 'Index Fund',
+        'beta': 1.15,
+        'week52High': 410.0,
+        'week52Low': 310.0,
+        'dayChange': 3.2,
+        'dayChangePct': 0.84,
+        'dividendYield': 0.6,
+        'ytdReturn': 18.2
+    },
+    'VTI': {
+        'currentPrice': 250.0,
+        'sector': 'ETF - Total Market',
+        'industry': 'Index Fund',
+        'beta': 1.0,
+        'week52High': 265.0,
+        'week52Low': 210.0,
+        'dayChange': 1.8,
+        'dayChangePct': 0.72,
+        'dividendYield': 1.4,
+        'ytdReturn': 11.8
+    },
+    'BND': {
+        'currentPrice': 78.5,
+        'sector': 'ETF - Bonds',
+        'industry': 'Bond Fund',
+        'beta': 0.1,
+        'week52High': 82.0,
+        'week52Low': 75.0,
+        'dayChange': 0.1,
+        'dayChangePct': 0.13,
+        'dividendYield': 3.8,
+        'ytdReturn': 2.1
+    },
+    'VXUS': {
+        'currentPrice': 62.0,
+        'sector': 'ETF - International',
+        'industry': 'Index Fund',
+        'beta': 0.85,
+        'week52High': 68.0,
+        'week52Low': 55.0,
+        'dayChange': 0.8,
+        'dayChangePct': 1.31,
+        'dividendYield': 2.8,
+        'ytdReturn': 8.4
+    },
+    'VNQ': {
+        'currentPrice': 95.0,
+        'sector': 'ETF - Real Estate',
+        'industry': 'REIT Fund',
+        'beta': 1.2,
+        'week52High': 105.0,
+        'week52Low': 80.0,
+        'dayChange': 1.2,
+        'dayChangePct': 1.28,
+        'dividendYield': 3.5,
+        'ytdReturn': 6.8
+    },
+    'IWM': {
+        'currentPrice': 220.0,
+        'sector': 'ETF - Small Cap',
+        'industry': 'Index Fund',
+        'beta': 1.3,
+        'week52High': 240.0,
+        'week52Low': 180.0,
+        'dayChange': 2.8,
+        'dayChangePct': 1.29,
+        'dividendYield': 1.1,
+        'ytdReturn': 9.2
+    },
+    'EFA': {
+        'currentPrice': 75.0,
+        'sector': 'ETF - International Developed',
+        'industry': 'Index Fund',
+        'beta': 0.9,
+        'week52High': 82.0,
+        'week52Low': 65.0,
+        'dayChange': 0.9,
+        'dayChangePct': 1.22,
+        'dividendYield': 2.9,
+        'ytdReturn': 7.8
+    },
+    'EEM': {
+        'currentPrice': 42.0,
+        'sector': 'ETF - Emerging Markets',
+        'industry': 'Index Fund',
+        'beta': 1.1,
+        'week52High': 48.0,
+        'week52Low': 36.0,
+        'dayChange': 0.6,
+        'dayChangePct': 1.45,
+        'dividendYield': 2.4,
+        'ytdReturn': 5.2
+    },
+    'GLD': {
+        'currentPrice': 185.0,
+        'sector': 'ETF - Commodities',
+        'industry': 'Gold Fund',
+        'beta': 0.2,
+        'week52High': 210.0,
+        'week52Low': 170.0,
+        'dayChange': -0.8,
+        'dayChangePct': -0.43,
+        'dividendYield': 0.0,
+        'ytdReturn': -2.1
+    },
+    'TLT': {
+        'currentPrice': 92.0,
+        'sector': 'ETF - Long Term Bonds',
+        'industry': 'Bond Fund',
+        'beta': -0.3,
+        'week52High': 105.0,
+        'week52Low': 85.0,
+        'dayChange': 0.3,
+        'dayChangePct': 0.33,
+        'dividendYield': 4.2,
+        'ytdReturn': -8.5
+    },
+    'XLF': {
+        'currentPrice': 38.0,
+        'sector': 'ETF - Financial',
+        'industry': 'Sector Fund',
+        'beta': 1.2,
+        'week52High': 42.0,
+        'week52Low': 32.0,
+        'dayChange': 0.5,
+        'dayChangePct': 1.33,
+        'dividendYield': 1.8,
+        'ytdReturn': 14.2
+    },
+    'XLK': {
+        'currentPrice': 175.0,
+        'sector': 'ETF - Technology',
+        'industry': 'Sector Fund',
+        'beta': 1.1,
+        'week52High': 190.0,
+        'week52Low': 140.0,
+        'dayChange': 2.1,
+        'dayChangePct': 1.22,
+        'dividendYield': 0.7,
+        'ytdReturn': 22.8
+    }
+}
+
+# Indian ETF/Mutual Fund Fallbacks
+INDIAN_FUND_FALLBACKS = {
+    'NIFTYBEES': {
+        'currentPrice': 250.0,
+        'sector': 'ETF - Indian Large Cap',
+        'industry': 'Index Fund',
+        'beta': 1.0,
+        'week52High': 280.0,
+        'week52Low': 220.0,
+        'dayChange': 3.5,
+        'dayChangePct': 1.42,
+        'dividendYield': 1.2,
+        'ytdReturn': 15.8
+    },
+    'NIFTYBEES.NS': {
+        'currentPrice': 250.0,
+        'sector': 'ETF - Indian Large Cap',
+        'industry': 'Index Fund',
+        'beta': 1.0,
+        'week52High': 280.0,
+        'week52Low': 220.0,
+        'dayChange': 3.5,
+        'dayChangePct': 1.42,
+        'dividendYield': 1.2,
+        'ytdReturn': 15.8
+    },
+    'JUNIORBEES': {
+        'currentPrice': 450.0,
+        'sector': 'ETF - Indian Small Cap',
+        'industry': 'Index Fund',
+        'beta': 1.4,
+        'week52High': 520.0,
+        'week52Low': 380.0,
+        'dayChange': 8.2,
+        'dayChangePct': 1.85,
+        'dividendYield': 0.8,
+        'ytdReturn': 18.5
+    },
+    'JUNIORBEES.NS': {
+        'currentPrice': 450.0,
+        'sector': 'ETF - Indian Small Cap',
+        'industry': 'Index Fund',
+        'beta': 1.4,
+        'week52High': 520.0,
+        'week52Low': 380.0,
+        'dayChange': 8.2,
+        'dayChangePct': 1.85,
+        'dividendYield': 0.8,
+        'ytdReturn': 18.5
+    },
+    'BANKBEES': {
+        'currentPrice': 520.0,
+        'sector': 'ETF - Indian Banking',
+        'industry': 'Sector Fund',
+        'beta': 1.3,
+        'week52High': 580.0,
+        'week52Low': 450.0,
+        'dayChange': 7.8,
+        'dayChangePct': 1.52,
+        'dividendYield': 1.5,
+        'ytdReturn': 12.4
+    },
+    'BANKBEES.NS': {
+        'currentPrice': 520.0,
+        'sector': 'ETF - Indian Banking',
+        'industry': 'Sector Fund',
+        'beta': 1.3,
+        'week52High': 580.0,
+        'week52Low': 450.0,
+        'dayChange': 7.8,
+        'dayChangePct': 1.52,
+        'dividendYield': 1.5,
+        'ytdReturn': 12.4
+    },
+    'MOSL500.NS': {
+        'currentPrice': 45.0,
+        'sector': 'ETF - Indian Large Cap',
+        'industry': 'Index Fund',
+        'beta': 1.0,
+        'week52High': 52.0,
+        'week52Low': 38.0,
+        'dayChange': 0.6,
+        'dayChangePct': 1.35,
+        'dividendYield': 1.1,
+        'ytdReturn': 14.2
+    },
+    'CPSEETF.NS': {
+        'currentPrice': 94.0,
+        'sector': 'ETF - Indian Bonds',
+        'industry': 'Bond Fund',
+        'beta': 0.1,
+        'week52High': 98.0,
+        'week52Low': 90.0,
+        'dayChange': 0.1,
+        'dayChangePct': 0.11,
+        'dividendYield': 6.8,
+        'ytdReturn': 4.2
+    },
+    'LIQUIDBEES.NS': {
+        'currentPrice': 1000.0,
+        'sector': 'ETF - Liquid Fund',
+        'industry': 'Money Market',
+        'beta': 0.01,
+        'week52High': 1002.0,
+        'week52Low': 998.0,
+        'dayChange': 0.2,
+        'dayChangePct': 0.02,
+        'dividendYield': 6.5,
+        'ytdReturn': 6.8
+    },
+    'GOLDBEES.NS': {
+        'currentPrice': 55.0,
+        'sector': 'ETF - Gold',
+        'industry': 'Commodity Fund',
+        'beta': 0.2,
+        'week52High': 62.0,
+        'week52Low': 48.0,
+        'dayChange': -0.3,
+        'dayChangePct': -0.54,
+        'dividendYield': 0.0,
+        'ytdReturn': -1.8
+    }
+}
+
+# Stock Fallbacks for common symbols
+STOCK_FALLBACKS = {
+    'AAPL': {
+        'currentPrice': 175.0,
+        'sector': 'Technology',
+        'industry': 'Consumer Electronics',
+        'beta': 1.2,
+        'week52High': 195.0,
+        'week52Low': 140.0,
+        'dayChange': 2.1,
+        'dayChangePct': 1.22,
+        'dividendYield': 0.5,
+        'ytdReturn': 18.5
+    },
+    'MSFT': {
+        'currentPrice': 380.0,
+        'sector': 'Technology',
+        'industry': 'Software',
+        'beta': 0.9,
+        'week52High': 420.0,
+        'week52Low': 310.0,
+        'dayChange': 4.2,
+        'dayChangePct': 1.12,
+        'dividendYield': 0.7,
+        'ytdReturn': 16.8
+    },
+    'GOOGL': {
+        'currentPrice': 140.0,
+        'sector': 'Technology',
+        'industry': 'Internet Services',
+        'beta': 1.1,
+        'week52High': 155.0,
+        'week52Low': 115.0,
+        'dayChange': 1.8,
+        'dayChangePct': 1.31,
+        'dividendYield': 0.0,
+        'ytdReturn': 12.2
+    },
+    'TSLA': {
+        'currentPrice': 220.0,
+        'sector': 'Consumer Cyclical',
+        'industry': 'Auto Manufacturers',
+        'beta': 2.0,
+        'week52High': 280.0,
+        'week52Low': 140.0,
+        'dayChange': 8.5,
+        'dayChangePct': 4.01,
+        'dividendYield': 0.0,
+        'ytdReturn': 28.5
+    },
+    'NVDA': {
+        'currentPrice': 450.0,
+        'sector': 'Technology',
+        'industry': 'Semiconductors',
+        'beta': 1.8,
+        'week52High': 500.0,
+        'week52Low': 200.0,
+        'dayChange': 12.5,
+        'dayChangePct': 2.85,
+        'dividendYield': 0.1,
+        'ytdReturn': 85.2
+    },
+    'AMZN': {
+        'currentPrice': 145.0,
+        'sector': 'Consumer Cyclical',
+        'industry': 'Internet Retail',
+        'beta': 1.3,
+        'week52High': 170.0,
+        'week52Low': 120.0,
+        'dayChange': 2.8,
+        'dayChangePct': 1.97,
+        'dividendYield': 0.0,
+        'ytdReturn': 14.8
+    }
+}
+
+# Indian Stock Fallbacks
+INDIAN_STOCK_FALLBACKS = {
+    'RELIANCE': {
+        'currentPrice': 2850.0,
+        'sector': 'Energy',
+        'industry': 'Oil & Gas Integrated',
+        'beta': 0.8,
+        'week52High': 3100.0,
+        'week52Low': 2400.0,
+        'dayChange': 25.5,
+        'dayChangePct': 0.90,
+        'dividendYield': 0.4,
+        'ytdReturn': 8.5
+    },
+    'TCS': {
+        'currentPrice': 3950.0,
+        'sector': 'Technology',
+        'industry': 'IT Services',
+        'beta': 0.7,
+        'week52High': 4200.0,
+        'week52Low': 3200.0,
+        'dayChange': 42.0,
+        'dayChangePct': 1.08,
+        'dividendYield': 1.2,
+        'ytdReturn': 12.8
+    },
+    'INFY': {
+        'currentPrice': 1750.0,
+        'sector': 'Technology',
+        'industry': 'IT Services',
+        'beta': 0.8,
+        'week52High': 1900.0,
+        'week52Low': 1400.0,
+        'dayChange': 18.5,
+        'dayChangePct': 1.07,
+        'dividendYield': 2.1,
+        'ytdReturn': 15.2
+    },
+    'HDFCBANK': {
+        'currentPrice': 1680.0,
+        'sector': 'Financial Services',
+        'industry': 'Banks',
+        'beta': 1.1,
+        'week52High': 1800.0,
+        'week52Low': 1450.0,
+        'dayChange': 22.5,
+        'dayChangePct': 1.36,
+        'dividendYield': 1.0,
+        'ytdReturn': 9.8
+    }
+}
+
+# Bond/Treasury Fallbacks
+BOND_FALLBACKS = {
+    'US_TREASURY_10Y': {
+        'currentPrice': 95.5,
+        'sector': 'Government Bonds',
+        'industry': 'Treasury Securities',
+        'beta': -0.2,
+        'week52High': 98.0,
+        'week52Low': 92.0,
+        'dayChange': 0.1,
+        'dayChangePct': 0.10,
+        'dividendYield': 4.2,
+        'ytdReturn': -2.1
+    },
+    'US_TREASURY_2Y': {
+        'currentPrice': 98.2,
+        'sector': 'Government Bonds',
+        'industry': 'Treasury Securities',
+        'beta': -0.1,
+        'week52High': 99.5,
+        'week52Low': 96.8,
+        'dayChange': 0.05,
+        'dayChangePct': 0.05,
+        'dividendYield': 4.8,
+        'ytdReturn': -0.8
+    },
+    'US_TREASURY_30Y': {
+        'currentPrice': 88.5,
+        'sector': 'Government Bonds',
+        'industry': 'Treasury Securities',
+        'beta': -0.4,
+        'week52High': 95.0,
+        'week52Low': 82.0,
+        'dayChange': 0.2,
+        'dayChangePct': 0.23,
+        'dividendYield': 4.5,
+        'ytdReturn': -8.2
+    },
+    'CORPORATE_AAA': {
+        'currentPrice': 92.0,
+        'sector': 'Corporate Bonds',
+        'industry': 'Investment Grade',
+        'beta': 0.1,
+        'week52High': 96.0,
+        'week52Low': 88.0,
+        'dayChange': 0.15,
+        'dayChangePct': 0.16,
+        'dividendYield': 5.2,
+        'ytdReturn': -1.5
+    },
+    'CORPORATE_BBB': {
+        'currentPrice': 89.5,
+        'sector': 'Corporate Bonds',
+        'industry': 'Investment Grade',
+        'beta': 0.2,
+        'week52High': 94.0,
+        'week52Low': 85.0,
+        'dayChange': 0.2,
+        'dayChangePct': 0.22,
+        'dividendYield': 6.1,
+        'ytdReturn': -2.8
+    },
+    'HIGH_YIELD_CORP': {
+        'currentPrice': 85.0,
+        'sector': 'Corporate Bonds',
+        'industry': 'High Yield',
+        'beta': 0.4,
+        'week52High': 92.0,
+        'week52Low': 78.0,
+        'dayChange': 0.3,
+        'dayChangePct': 0.35,
+        'dividendYield': 8.5,
+        'ytdReturn': -5.2
+    }
+}
+
+# Debt Fund Fallbacks
+DEBT_FUND_KEYWORDS = (
+    'GILT', 'DEBT', 'BOND', 'LIQUID', 
+    'IDFC', 'ICICI', 'HDFC', 'SBI', 'AXIS',
+    'CORP', 'BANKING', 'PSU', 'SHORT', 'ULTRA',
+    'TREASURY', 'AAA', 'BBB', 'YIELD'
+)
+
+# Check fallback databases in order of preference
+FALLBACK_SOURCES = (
+    (ETF_FALLBACKS, "ETF"),
+    (BOND_FALLBACKS, "Bond/Treasury"),
+    (INDIAN_FUND_FALLBACKS, "Indian Fund"),
+    (STOCK_FALLBACKS, "US Stock"),
+    (INDIAN_STOCK_FALLBACKS, "Indian Stock")
+)
+
+# Symbol fragments that identify a generic ETF/fund
+GENERIC_ETF_KEYWORDS = ('ETF', 'FUND', 'INDEX', 'SPDR', 'ISHARES', 'VANGUARD')
+
+
 class StrandMarketDataAgent:
     """
     Strands SDK Market Data Agent with intelligent fallback system
     Enhanced for Indian Market
     """
     
-    def __init__(self, delay_between_calls=0.3, max_retries=3):
-        """Initialize with multiple API configurations"""
-        self.dynamodb = boto3.resource("dynamodb", region_name=os.getenv("AWS_REGION", "us-east-1"))
+    def __init__(self, delay_between_calls=0.3, max_retries=3, dynamodb=None):
+        """Initialize with multiple API configurations (dynamodb: shared resource to reuse)"""
+        self.dynamodb = dynamodb or boto3.resource("dynamodb", region_name=os.getenv("AWS_REGION", "us-east-1"))
         self.portfolios_table = self.dynamodb.Table('WealthWisePortfolios')
         
         # API Configuration
@@ -104,19 +629,12 @@ class StrandMarketDataAgent:
     
     def _is_indian_symbol(self, symbol: str) -> bool:
         """Check if a symbol is likely an Indian stock"""
-        indian_stocks = [
-            'RELIANCE', 'TCS', 'INFY', 'HDFCBANK', 'ICICIBANK', 
-            'SBIN', 'BHARTIARTL', 'ITC', 'KOTAKBANK', 'LT', 
-            'AXISBANK', 'HINDUNILVR', 'BAJFINANCE', 'ASIANPAINT',
-            'MARUTI', 'TITAN', 'WIPRO', 'ULTRACEMCO', 'SUNPHARMA',
-            'NESTLEIND', 'HCLTECH', 'TECHM', 'TATAMOTORS', 'ADANIPORTS',
-            'POWERGRID', 'ONGC', 'NTPC', 'COALINDIA', 'DRREDDY', 'CIPLA'
-        ]
+        symbol_upper = symbol.upper()
         
         # Check if symbol is in known Indian stocks or has Indian exchange suffix
-        return (symbol.upper() in indian_stocks or 
-                '.NS' in symbol.upper() or 
-                '.BO' in symbol.upper())
+        return (symbol_upper in INDIAN_STOCK_SYMBOLS or 
+                '.NS' in symbol_upper or 
+                '.BO' in symbol_upper)
     
     def _respect_rate_limit(self, api_name: str):
         """Enforce rate limiting for each API"""
@@ -147,520 +665,15 @@ class StrandMarketDataAgent:
         """
         symbol_upper = symbol.upper()
         
-        # ETF Fallback Data - Common US ETFs
-        etf_fallbacks = {
-            'SPY': {
-                'currentPrice': 445.0,
-                'sector': 'ETF - Large Cap',
-                'industry': 'Index Fund',
-                'beta': 1.0,
-                'week52High': 470.0,
-                'week52Low': 380.0,
-                'dayChange': 2.5,
-                'dayChangePct': 0.56,
-                'dividendYield': 1.3,
-                'ytdReturn': 12.5
-            },
-            'QQQ': {
-                'currentPrice': 385.0,
-                'sector': 'ETF - Technology',
-                'industry': 'Index Fund',
-                'beta': 1.15,
-                'week52High': 410.0,
-                'week52Low': 310.0,
-                'dayChange': 3.2,
-                'dayChangePct': 0.84,
-                'dividendYield': 0.6,
-                'ytdReturn': 18.2
-            },
-            'VTI': {
-                'currentPrice': 250.0,
-                'sector': 'ETF - Total Market',
-                'industry': 'Index Fund',
-                'beta': 1.0,
-                'week52High': 265.0,
-                'week52Low': 210.0,
-                'dayChange': 1.8,
-                'dayChangePct': 0.72,
-                'dividendYield': 1.4,
-                'ytdReturn': 11.8
-            },
-            'BND': {
-                'currentPrice': 78.5,
-                'sector': 'ETF - Bonds',
-                'industry': 'Bond Fund',
-                'beta': 0.1,
-                'week52High': 82.0,
-                'week52Low': 75.0,
-                'dayChange': 0.1,
-                'dayChangePct': 0.13,
-                'dividendYield': 3.8,
-                'ytdReturn': 2.1
-            },
-            'VXUS': {
-                'currentPrice': 62.0,
-                'sector': 'ETF - International',
-                'industry': 'Index Fund',
-                'beta': 0.85,
-                'week52High': 68.0,
-                'week52Low': 55.0,
-                'dayChange': 0.8,
-                'dayChangePct': 1.31,
-                'dividendYield': 2.8,
-                'ytdReturn': 8.4
-            },
-            'VNQ': {
-                'currentPrice': 95.0,
-                'sector': 'ETF - Real Estate',
-                'industry': 'REIT Fund',
-                'beta': 1.2,
-                'week52High': 105.0,
-                'week52Low': 80.0,
-                'dayChange': 1.2,
-                'dayChangePct': 1.28,
-                'dividendYield': 3.5,
-                'ytdReturn': 6.8
-            },
-            'IWM': {
-                'currentPrice': 220.0,
-                'sector': 'ETF - Small Cap',
-                'industry': 'Index Fund',
-                'beta': 1.3,
-                'week52High': 240.0,
-                'week52Low': 180.0,
-                'dayChange': 2.8,
-                'dayChangePct': 1.29,
-                'dividendYield': 1.1,
-                'ytdReturn': 9.2
-            },
-            'EFA': {
-                'currentPrice': 75.0,
-                'sector': 'ETF - International Developed',
-                'industry': 'Index Fund',
-                'beta': 0.9,
-                'week52High': 82.0,
-                'week52Low': 65.0,
-                'dayChange': 0.9,
-                'dayChangePct': 1.22,
-                'dividendYield': 2.9,
-                'ytdReturn': 7.8
-            },
-            'EEM': {
-                'currentPrice': 42.0,
-                'sector': 'ETF - Emerging Markets',
-                'industry': 'Index Fund',
-                'beta': 1.1,
-                'week52High': 48.0,
-                'week52Low': 36.0,
-                'dayChange': 0.6,
-                'dayChangePct': 1.45,
-                'dividendYield': 2.4,
-                'ytdReturn': 5.2
-            },
-            'GLD': {
-                'currentPrice': 185.0,
-                'sector': 'ETF - Commodities',
-                'industry': 'Gold Fund',
-                'beta': 0.2,
-                'week52High': 210.0,
-                'week52Low': 170.0,
-                'dayChange': -0.8,
-                'dayChangePct': -0.43,
-                'dividendYield': 0.0,
-                'ytdReturn': -2.1
-            },
-            'TLT': {
-                'currentPrice': 92.0,
-                'sector': 'ETF - Long Term Bonds',
-                'industry': 'Bond Fund',
-                'beta': -0.3,
-                'week52High': 105.0,
-                'week52Low': 85.0,
-                'dayChange': 0.3,
-                'dayChangePct': 0.33,
-                'dividendYield': 4.2,
-                'ytdReturn': -8.5
-            },
-            'XLF': {
-                'currentPrice': 38.0,
-                'sector': 'ETF - Financial',
-                'industry': 'Sector Fund',
-                'beta': 1.2,
-                'week52High': 42.0,
-                'week52Low': 32.0,
-                'dayChange': 0.5,
-                'dayChangePct': 1.33,
-                'dividendYield': 1.8,
-                'ytdReturn': 14.2
-            },
-            'XLK': {
-                'currentPrice': 175.0,
-                'sector': 'ETF - Technology',
-                'industry': 'Sector Fund',
-                'beta': 1.1,
-                'week52High': 190.0,
-                'week52Low': 140.0,
-                'dayChange': 2.1,
-                'dayChangePct': 1.22,
-                'dividendYield': 0.7,
-                'ytdReturn': 22.8
-            }
-        }
-        
-        # Indian ETF/Mutual Fund Fallbacks
-        indian_fund_fallbacks = {
-            'NIFTYBEES': {
-                'currentPrice': 250.0,
-                'sector': 'ETF - Indian Large Cap',
-                'industry': 'Index Fund',
-                'beta': 1.0,
-                'week52High': 280.0,
-                'week52Low': 220.0,
-                'dayChange': 3.5,
-                'dayChangePct': 1.42,
-                'dividendYield': 1.2,
-                'ytdReturn': 15.8
-            },
-            'NIFTYBEES.NS': {
-                'currentPrice': 250.0,
-                'sector': 'ETF - Indian Large Cap',
-                'industry': 'Index Fund',
-                'beta': 1.0,
-                'week52High': 280.0,
-                'week52Low': 220.0,
-                'dayChange': 3.5,
-                'dayChangePct': 1.42,
-                'dividendYield': 1.2,
-                'ytdReturn': 15.8
-            },
-            'JUNIORBEES': {
-                'currentPrice': 450.0,
-                'sector': 'ETF - Indian Small Cap',
-                'industry': 'Index Fund',
-                'beta': 1.4,
-                'week52High': 520.0,
-                'week52Low': 380.0,
-                'dayChange': 8.2,
-                'dayChangePct': 1.85,
-                'dividendYield': 0.8,
-                'ytdReturn': 18.5
-            },
-            'JUNIORBEES.NS': {
-                'currentPrice': 450.0,
-                'sector': 'ETF - Indian Small Cap',
-                'industry': 'Index Fund',
-                'beta': 1.4,
-                'week52High': 520.0,
-                'week52Low': 380.0,
-                'dayChange': 8.2,
-                'dayChangePct': 1.85,
-                'dividendYield': 0.8,
-                'ytdReturn': 18.5
-            },
-            'BANKBEES': {
-                'currentPrice': 520.0,
-                'sector': 'ETF - Indian Banking',
-                'industry': 'Sector Fund',
-                'beta': 1.3,
-                'week52High': 580.0,
-                'week52Low': 450.0,
-                'dayChange': 7.8,
-                'dayChangePct': 1.52,
-                'dividendYield': 1.5,
-                'ytdReturn': 12.4
-            },
-            'BANKBEES.NS': {
-                'currentPrice': 520.0,
-                'sector': 'ETF - Indian Banking',
-                'industry': 'Sector Fund',
-                'beta': 1.3,
-                'week52High': 580.0,
-                'week52Low': 450.0,
-                'dayChange': 7.8,
-                'dayChangePct': 1.52,
-                'dividendYield': 1.5,
-                'ytdReturn': 12.4
-            },
-            'MOSL500.NS': {
-                'currentPrice': 45.0,
-                'sector': 'ETF - Indian Large Cap',
-                'industry': 'Index Fund',
-                'beta': 1.0,
-                'week52High': 52.0,
-                'week52Low': 38.0,
-                'dayChange': 0.6,
-                'dayChangePct': 1.35,
-                'dividendYield': 1.1,
-                'ytdReturn': 14.2
-            },
-            'CPSEETF.NS': {
-                'currentPrice': 94.0,
-                'sector': 'ETF - Indian Bonds',
-                'industry': 'Bond Fund',
-                'beta': 0.1,
-                'week52High': 98.0,
-                'week52Low': 90.0,
-                'dayChange': 0.1,
-                'dayChangePct': 0.11,
-                'dividendYield': 6.8,
-                'ytdReturn': 4.2
-            },
-            'LIQUIDBEES.NS': {
-                'currentPrice': 1000.0,
-                'sector': 'ETF - Liquid Fund',
-                'industry': 'Money Market',
-                'beta': 0.01,
-                'week52High': 1002.0,
-                'week52Low': 998.0,
-                'dayChange': 0.2,
-                'dayChangePct': 0.02,
-                'dividendYield': 6.5,
-                'ytdReturn': 6.8
-            },
-            'GOLDBEES.NS': {
-                'currentPrice': 55.0,
-                'sector': 'ETF - Gold',
-                'industry': 'Commodity Fund',
-                'beta': 0.2,
-                'week52High': 62.0,
-                'week52Low': 48.0,
-                'dayChange': -0.3,
-                'dayChangePct': -0.54,
-                'dividendYield': 0.0,
-                'ytdReturn': -1.8
-            }
-        }
-        
-        # Stock Fallbacks for common symbols
-        stock_fallbacks = {
-            'AAPL': {
-                'currentPrice': 175.0,
-                'sector': 'Technology',
-                'industry': 'Consumer Electronics',
-                'beta': 1.2,
-                'week52High': 195.0,
-                'week52Low': 140.0,
-                'dayChange': 2.1,
-                'dayChangePct': 1.22,
-                'dividendYield': 0.5,
-                'ytdReturn': 18.5
-            },
-            'MSFT': {
-                'currentPrice': 380.0,
-                'sector': 'Technology',
-                'industry': 'Software',
-                'beta': 0.9,
-                'week52High': 420.0,
-                'week52Low': 310.0,
-                'dayChange': 4.2,
-                'dayChangePct': 1.12,
-                'dividendYield': 0.7,
-                'ytdReturn': 16.8
-            },
-            'GOOGL': {
-                'currentPrice': 140.0,
-                'sector': 'Technology',
-                'industry': 'Internet Services',
-                'beta': 1.1,
-                'week52High': 155.0,
-                'week52Low': 115.0,
-                'dayChange': 1.8,
-                'dayChangePct': 1.31,
-                'dividendYield': 0.0,
-                'ytdReturn': 12.2
-            },
-            'TSLA': {
-                'currentPrice': 220.0,
-                'sector': 'Consumer Cyclical',
-                'industry': 'Auto Manufacturers',
-                'beta': 2.0,
-                'week52High': 280.0,
-                'week52Low': 140.0,
-                'dayChange': 8.5,
-                'dayChangePct': 4.01,
-                'dividendYield': 0.0,
-                'ytdReturn': 28.5
-            },
-            'NVDA': {
-                'currentPrice': 450.0,
-                'sector': 'Technology',
-                'industry': 'Semiconductors',
-                'beta': 1.8,
-                'week52High': 500.0,
-                'week52Low': 200.0,
-                'dayChange': 12.5,
-                'dayChangePct': 2.85,
-                'dividendYield': 0.1,
-                'ytdReturn': 85.2
-            },
-            'AMZN': {
-                'currentPrice': 145.0,
-                'sector': 'Consumer Cyclical',
-                'industry': 'Internet Retail',
-                'beta': 1.3,
-                'week52High': 170.0,
-                'week52Low': 120.0,
-                'dayChange': 2.8,
-                'dayChangePct': 1.97,
-                'dividendYield': 0.0,
-                'ytdReturn': 14.8
-            }
-        }
-        
-        # Indian Stock Fallbacks
-        indian_stock_fallbacks = {
-            'RELIANCE': {
-                'currentPrice': 2850.0,
-                'sector': 'Energy',
-                'industry': 'Oil & Gas Integrated',
-                'beta': 0.8,
-                'week52High': 3100.0,
-                'week52Low': 2400.0,
-                'dayChange': 25.5,
-                'dayChangePct': 0.90,
-                'dividendYield': 0.4,
-                'ytdReturn': 8.5
-            },
-            'TCS': {
-                'currentPrice': 3950.0,
-                'sector': 'Technology',
-                'industry': 'IT Services',
-                'beta': 0.7,
-                'week52High': 4200.0,
-                'week52Low': 3200.0,
-                'dayChange': 42.0,
-                'dayChangePct': 1.08,
-                'dividendYield': 1.2,
-                'ytdReturn': 12.8
-            },
-            'INFY': {
-                'currentPrice': 1750.0,
-                'sector': 'Technology',
-                'industry': 'IT Services',
-                'beta': 0.8,
-                'week52High': 1900.0,
-                'week52Low': 1400.0,
-                'dayChange': 18.5,
-                'dayChangePct': 1.07,
-                'dividendYield': 2.1,
-                'ytdReturn': 15.2
-            },
-            'HDFCBANK': {
-                'currentPrice': 1680.0,
-                'sector': 'Financial Services',
-                'industry': 'Banks',
-                'beta': 1.1,
-                'week52High': 1800.0,
-                'week52Low': 1450.0,
-                'dayChange': 22.5,
-                'dayChangePct': 1.36,
-                'dividendYield': 1.0,
-                'ytdReturn': 9.8
-            }
-        }
-        
-        # Bond/Treasury Fallbacks
-        bond_fallbacks = {
-            'US_TREASURY_10Y': {
-                'currentPrice': 95.5,
-                'sector': 'Government Bonds',
-                'industry': 'Treasury Securities',
-                'beta': -0.2,
-                'week52High': 98.0,
-                'week52Low': 92.0,
-                'dayChange': 0.1,
-                'dayChangePct': 0.10,
-                'dividendYield': 4.2,
-                'ytdReturn': -2.1
-            },
-            'US_TREASURY_2Y': {
-                'currentPrice': 98.2,
-                'sector': 'Government Bonds',
-                'industry': 'Treasury Securities',
-                'beta': -0.1,
-                'week52High': 99.5,
-                'week52Low': 96.8,
-                'dayChange': 0.05,
-                'dayChangePct': 0.05,
-                'dividendYield': 4.8,
-                'ytdReturn': -0.8
-            },
-            'US_TREASURY_30Y': {
-                'currentPrice': 88.5,
-                'sector': 'Government Bonds',
-                'industry': 'Treasury Securities',
-                'beta': -0.4,
-                'week52High': 95.0,
-                'week52Low': 82.0,
-                'dayChange': 0.2,
-                'dayChangePct': 0.23,
-                'dividendYield': 4.5,
-                'ytdReturn': -8.2
-            },
-            'CORPORATE_AAA': {
-                'currentPrice': 92.0,
-                'sector': 'Corporate Bonds',
-                'industry': 'Investment Grade',
-                'beta': 0.1,
-                'week52High': 96.0,
-                'week52Low': 88.0,
-                'dayChange': 0.15,
-                'dayChangePct': 0.16,
-                'dividendYield': 5.2,
-                'ytdReturn': -1.5
-            },
-            'CORPORATE_BBB': {
-                'currentPrice': 89.5,
-                'sector': 'Corporate Bonds',
-                'industry': 'Investment Grade',
-                'beta': 0.2,
-                'week52High': 94.0,
-                'week52Low': 85.0,
-                'dayChange': 0.2,
-                'dayChangePct': 0.22,
-                'dividendYield': 6.1,
-                'ytdReturn': -2.8
-            },
-            'HIGH_YIELD_CORP': {
-                'currentPrice': 85.0,
-                'sector': 'Corporate Bonds',
-                'industry': 'High Yield',
-                'beta': 0.4,
-                'week52High': 92.0,
-                'week52Low': 78.0,
-                'dayChange': 0.3,
-                'dayChangePct': 0.35,
-                'dividendYield': 8.5,
-                'ytdReturn': -5.2
-            }
-        }
-        
-        # Debt Fund Fallbacks
-        debt_fund_keywords = [
-            'GILT', 'DEBT', 'BOND', 'LIQUID', 
-            'IDFC', 'ICICI', 'HDFC', 'SBI', 'AXIS',
-            'CORP', 'BANKING', 'PSU', 'SHORT', 'ULTRA',
-            'TREASURY', 'AAA', 'BBB', 'YIELD'
-        ]
-        
-        # Check fallback databases in order of preference
-        fallback_sources = [
-            (etf_fallbacks, "ETF"),
-            (bond_fallbacks, "Bond/Treasury"),
-            (indian_fund_fallbacks, "Indian Fund"),
-            (stock_fallbacks, "US Stock"),
-            (indian_stock_fallbacks, "Indian Stock")
-        ]
-        
         # Try exact symbol match first
-        for fallback_db, source_type in fallback_sources:
+        for fallback_db, source_type in FALLBACK_SOURCES:
             if symbol_upper in fallback_db:
-                base_data = fallback_db[symbol_upper].copy()
+                base_data = fallback_db[symbol_upper]
                 print(f"💡 Using {source_type} fallback for {symbol}")
                 return self._build_fallback_response(base_data)
         
         # Check for debt fund patterns
-        is_debt_fund = any(keyword in symbol_upper for keyword in debt_fund_keywords)
+        is_debt_fund = any(keyword in symbol_upper for keyword in DEBT_FUND_KEYWORDS)
         if is_debt_fund:
             print(f"💡 {symbol} appears to be debt fund - using generic debt fallback")
             base_data = {
@@ -678,7 +691,7 @@ class StrandMarketDataAgent:
             return self._build_fallback_response(base_data)
         
         # Generic fallback based on symbol characteristics
-        if any(etf_keyword in symbol_upper for etf_keyword in ['ETF', 'FUND', 'INDEX', 'SPDR', 'ISHARES', 'VANGUARD']):
+        if any(etf_keyword in symbol_upper for etf_keyword in GENERIC_ETF_KEYWORDS):
             print(f"💡 {symbol} appears to be ETF - using generic ETF fallback")
             base_data = {
                 'currentPrice': 100.0,
@@ -821,17 +834,7 @@ class StrandMarketDataAgent:
             # Auto-add .NS suffix for Indian stocks if not present
             yahoo_symbol = symbol
             if not ('.' in symbol or '_' in symbol):
-                # List of common Indian stocks
-                indian_stocks = [
-                    'RELIANCE', 'TCS', 'INFY', 'HDFCBANK', 'ICICIBANK', 
-                    'SBIN', 'BHARTIARTL', 'ITC', 'KOTAKBANK', 'LT', 
-                    'AXISBANK', 'HINDUNILVR', 'BAJFINANCE', 'ASIANPAINT',
-                    'MARUTI', 'TITAN', 'WIPRO', 'ULTRACEMCO', 'SUNPHARMA',
-                    'NESTLEIND', 'HCLTECH', 'TECHM', 'TATAMOTORS', 'ADANIPORTS',
-                    'POWERGRID', 'ONGC', 'NTPC', 'COALINDIA', 'DRREDDY', 'CIPLA'
-                ]
-                
-                if symbol.upper() in indian_stocks:
+                if symbol.upper() in INDIAN_STOCK_SYMBOLS:
                     yahoo_symbol = f"{symbol}.NS"
                     print(f"   🇮🇳 Auto-adding NSE suffix: {symbol} → {yahoo_symbol}")
             
@@ -1084,14 +1087,7 @@ class StrandMarketDataAgent:
         api_methods = []
         
         # Check if this might be an Indian stock
-        indian_stocks = [
-            'RELIANCE', 'TCS', 'INFY', 'HDFCBANK', 'ICICIBANK', 
-            'SBIN', 'BHARTIARTL', 'ITC', 'KOTAKBANK', 'LT', 
-            'AXISBANK', 'HINDUNILVR', 'BAJFINANCE', 'ASIANPAINT',
-            'MARUTI', 'TITAN', 'WIPRO', 'ULTRACEMCO', 'SUNPHARMA'
-        ]
-        
-        is_likely_indian = symbol.upper() in indian_stocks or '.NS' in symbol.upper() or '.BO' in symbol.upper()
+        is_likely_indian = self._is_indian_symbol(symbol)
         
         if is_likely_indian:
             # For Indian stocks, try Indian APIs first
@@ -1185,10 +1181,11 @@ class StrandMarketDataAgent:
                 })
                 print(f"   Added ETF: {etf['symbol']} (qty: {etf['quantity']})")
         
+        type_counts = Counter(s['type'] for s in symbols)
         print(f"📊 Found {len(symbols)} total holdings:")
-        print(f"   - Bonds: {len([s for s in symbols if s['type'] == 'bond'])}")
-        print(f"   - Stocks: {len([s for s in symbols if s['type'] == 'stock'])}")
-        print(f"   - ETFs: {len([s for s in symbols if s['type'] == 'etf'])}")
+        print(f"   - Bonds: {type_counts['bond']}")
+        print(f"   - Stocks: {type_counts['stock']}")
+        print(f"   - ETFs: {type_counts['etf']}")
         
         return symbols
     
@@ -1256,32 +1253,35 @@ class StrandMarketDataAgent:
         """Calculate portfolio-level aggregate metrics"""
         total_value = sum(h['currentValue'] for h in enriched_holdings)
         
-        for holding in enriched_holdings:
-            holding['portfolioWeight'] = round((holding['currentValue'] / total_value) * 100, 2) if total_value > 0 else 0
-        
+        # Single pass: weights, sector totals, beta and day change together
         sector_allocation = {}
+        portfolio_beta = 0
+        beta_weight_sum = 0
+        day_total_change = 0
+        
         for holding in enriched_holdings:
+            value = holding['currentValue']
+            weight = value / total_value if total_value > 0 else 0
+            holding['portfolioWeight'] = round(weight * 100, 2)
+            
             sector = holding['sector']
-            if sector not in sector_allocation:
-                sector_allocation[sector] = 0
-            sector_allocation[sector] += holding['currentValue']
+            sector_allocation[sector] = sector_allocation.get(sector, 0) + value
+            
+            if holding['beta'] is not None:
+                portfolio_beta += holding['beta'] * weight
+                beta_weight_sum += weight
+            
+            if holding['dayChange'] is not None:
+                day_total_change += holding['dayChange'] * holding['quantity']
         
         sector_breakdown = {
             sector: round((value / total_value) * 100, 2)
             for sector, value in sector_allocation.items()
         } if total_value > 0 else {}
         
-        portfolio_beta = 0
-        beta_weight_sum = 0
-        for holding in enriched_holdings:
-            if holding['beta'] is not None:
-                weight = holding['currentValue'] / total_value if total_value > 0 else 0
-                portfolio_beta += holding['beta'] * weight
-                beta_weight_sum += weight
-        
         portfolio_beta = round(portfolio_beta, 2) if beta_weight_sum > 0 else None
         
-        top_holdings = sorted(enriched_holdings, key=lambda x: x['currentValue'], reverse=True)[:5]
+        top_holdings = heapq.nlargest(5, enriched_holdings, key=itemgetter('currentValue'))
         top_5 = [
             {
                 'symbol': h['symbol'],
@@ -1291,11 +1291,6 @@ class StrandMarketDataAgent:
             for h in top_holdings
         ]
         
-        day_total_change = sum(
-            h['dayChange'] * h['quantity'] 
-            for h in enriched_holdings 
-            if h['dayChange'] is not None
-        )
         day_total_change_pct = (day_total_change / total_value) * 100 if total_value > 0 else 0
         
         return {
@@ -1307,15 +1302,16 @@ class StrandMarketDataAgent:
             'dayTotalChangePct': round(day_total_change_pct, 2)
         }
     
-    def generate_report(self, user_email: str) -> Dict:
-        """Generate complete market report using hybrid API approach"""
+    def generate_report(self, user_email: str, portfolio: Optional[Dict] = None) -> Dict:
+        """Generate complete market report using hybrid API approach (portfolio: pre-fetched item, read here if omitted)"""
         print("=" * 60)
         print(f"📊 [Strand Market Agent] Starting report generation")
         print(f"👤 User: {user_email}")
         print("=" * 60)
         
         try:
-            portfolio = self.get_portfolio(user_email)
+            if portfolio is None:
+                portfolio = self.get_portfolio(user_email)
             if not portfolio:
                 return {
                     'success': False,
@@ -1376,7 +1372,7 @@ class StrandMarketDataAgent:
             
             return {
                 'success': True,
-                'timestamp': datetime.utcnow().isoformat(),
+                'timestamp': datetime.now(timezone.utc).isoformat(),
                 'userId': user_email,
                 'holdings': enriched_holdings,
                 'portfolioMetrics': portfolio_metrics,
@@ -1400,11 +1396,12 @@ class StrandMarketDataAgent:
             }
 
 
-def create_market_agent():
+def create_market_agent(dynamodb=None):
     print("🏭 [Factory] Creating Strand Market Data Agent...")
     agent = StrandMarketDataAgent(
         delay_between_calls=0.3,
-        max_retries=3
+        max_retries=3,
+        dynamodb=dynamodb
     )
     
     print("✅ [Factory] Strand Market Data Agent created successfully")
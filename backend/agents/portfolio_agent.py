@@ -5,11 +5,10 @@ Converts the PortfolioAnalysisAgent to use Strands SDK patterns
 
 import os
 import boto3
-from typing import Dict, List, Optional, Any, Tuple
-from datetime import datetime
+from bisect import bisect_right
+from typing import Dict, Iterator, List, Optional, Tuple
+from datetime import datetime, timezone
 from decimal import Decimal
-from strands import Agent
-from strands.models import BedrockModel
 
 
 def convert_decimal_to_float(obj):
@@ -24,15 +23,57 @@ def convert_decimal_to_float(obj):
         return obj
 
 
+# Symbols always classified as bonds regardless of holding type/sector
+BOND_SYMBOLS = frozenset({'BND', 'AGG', 'TLT'})
+
+# Risk tolerances that qualify younger investors for the ModeratelyAggressive model
+GROWTH_RISK_LEVELS = frozenset({'aggressive', 'moderately aggressive'})
+
+# Benchmark returns per model portfolio (example - would fetch actual data)
+BENCHMARK_RETURNS = {
+    "Conservative": {"ytd": 5.2, "name": "30/60 Conservative Portfolio"},
+    "ModeratelyConservative": {"ytd": 6.8, "name": "45/45 Moderate-Conservative Portfolio"},
+    "Moderate": {"ytd": 8.5, "name": "60/30 Moderate Portfolio"},
+    "ModeratelyAggressive": {"ytd": 10.2, "name": "75/20 Moderate-Aggressive Portfolio"},
+    "Aggressive": {"ytd": 11.8, "name": "85/10 Aggressive Portfolio"}
+}
+
+# Health score cut-offs, ascending; a score at a cut-off earns the higher grade
+HEALTH_GRADE_THRESHOLDS = (60, 70, 80, 90)
+HEALTH_GRADES = (
+    ("F", "CRITICAL"),
+    ("D", "POOR"),
+    ("C", "FAIR"),
+    ("B", "GOOD"),
+    ("A", "EXCELLENT"),
+)
+
+# Sort order for generated recommendations (unknown priorities go last)
+PRIORITY_RANK = {"HIGH": 1, "MEDIUM": 2, "LOW": 3}
+
+
+def _select_model_name(age, risk: str) -> str:
+    """Map (age, lowercased risk tolerance) to a model portfolio name"""
+    if age >= 55 or risk == 'conservative':
+        return "Conservative"
+    elif age >= 45 or risk == 'moderately conservative':
+        return "ModeratelyConservative"
+    elif age <= 25 and risk == 'aggressive':
+        return "Aggressive"
+    elif (age <= 35 and risk in GROWTH_RISK_LEVELS) or risk == 'moderately aggressive':
+        return "ModeratelyAggressive"
+    return "Moderate"  # Default
+
+
 class StrandPortfolioAnalysisAgent:
     """
     Strands SDK Portfolio Analysis Agent
     Comprehensive portfolio analysis with health scoring and recommendations
     """
     
-    def __init__(self):
-        """Initialize DynamoDB connection and model portfolios"""
-        self.dynamodb = boto3.resource("dynamodb", region_name=os.getenv("AWS_REGION", "us-east-1"))
+    def __init__(self, dynamodb=None):
+        """Initialize DynamoDB connection (reusing dynamodb if given) and model portfolios"""
+        self.dynamodb = dynamodb or boto3.resource("dynamodb", region_name=os.getenv("AWS_REGION", "us-east-1"))
         self.users_table = self.dynamodb.Table('WealthWiseUsers')
         self.portfolios_table = self.dynamodb.Table('WealthWisePortfolios')
         
@@ -113,17 +154,8 @@ class StrandPortfolioAnalysisAgent:
         
         print(f"📊 User Profile: Age {age}, Risk: {risk.title()}, Horizon: {horizon}")
         
-        # Selection logic
-        if age >= 55 or risk == 'conservative':
-            model_name = "Conservative"
-        elif age >= 45 or risk == 'moderately conservative':
-            model_name = "ModeratelyConservative"
-        elif age <= 25 and risk == 'aggressive':
-            model_name = "Aggressive"
-        elif (age <= 35 and risk in ['aggressive', 'moderately aggressive']) or risk == 'moderately aggressive':
-            model_name = "ModeratelyAggressive"
-        else:
-            model_name = "Moderate"  # Default
+        # Selection logic depends only on age and risk tolerance
+        model_name = _select_model_name(age, risk)
         
         model = self.MODEL_PORTFOLIOS[model_name]
         print(f"✅ Selected Model: {model_name}")
@@ -134,7 +166,7 @@ class StrandPortfolioAnalysisAgent:
     # ==================== MODULE 2: ALLOCATION ANALYZER ====================
     
     def analyze_allocation(self, current_holdings: List[Dict], target_model: Dict, 
-                          cash_savings: float) -> Dict:
+                          cash_savings: float) -> Tuple[Dict, float]:
         """
         Compare current vs target allocation and calculate drift
         
@@ -144,32 +176,41 @@ class StrandPortfolioAnalysisAgent:
             cash_savings: Float of cash amount
         
         Returns:
-            Dict with current, target, drift, and issues
+            Tuple of (dict with current, target, drift, and issues,
+            largest portfolioWeight among the holdings)
         """
-        # Calculate total assets
-        total_invested = sum(h['currentValue'] for h in current_holdings)
-        total_assets = total_invested + cash_savings
-        
-        # Categorize holdings
+        # Total and categorize holdings in a single pass
+        total_invested = 0
         stocks_value = 0
         bonds_value = 0
+        max_weight = 0
         
         for holding in current_holdings:
+            value = holding['currentValue']
+            total_invested += value
+            weight = holding.get('portfolioWeight', 0)
+            if weight > max_weight:
+                max_weight = weight
             holding_type = holding.get('type', 'stock').lower()
             sector = holding.get('sector', '').upper()
             
             # Classify as stock or bond
-            if holding_type == 'bond' or 'BOND' in sector or holding['symbol'].upper() in ['BND', 'AGG', 'TLT']:
-                bonds_value += holding['currentValue']
+            if holding_type == 'bond' or 'BOND' in sector or holding['symbol'].upper() in BOND_SYMBOLS:
+                bonds_value += value
             else:
-                stocks_value += holding['currentValue']
+                stocks_value += value
+        
+        total_assets = total_invested + cash_savings
         
         # Calculate current allocation percentages
-        current_allocation = {
-            "stocks": round((stocks_value / total_assets) * 100, 1) if total_assets > 0 else 0,
-            "bonds": round((bonds_value / total_assets) * 100, 1) if total_assets > 0 else 0,
-            "cash": round((cash_savings / total_assets) * 100, 1) if total_assets > 0 else 0
-        }
+        if total_assets > 0:
+            current_allocation = {
+                "stocks": round((stocks_value / total_assets) * 100, 1),
+                "bonds": round((bonds_value / total_assets) * 100, 1),
+                "cash": round((cash_savings / total_assets) * 100, 1)
+            }
+        else:
+            current_allocation = {"stocks": 0, "bonds": 0, "cash": 0}
         
         target_allocation = {
             "stocks": target_model['stocks'],
@@ -191,11 +232,8 @@ class StrandPortfolioAnalysisAgent:
             issues.append("MISSING_BONDS")
         
         # Check concentration
-        for holding in current_holdings:
-            weight = holding.get('portfolioWeight', 0)
-            if weight > 30:
-                issues.append("CONCENTRATION_RISK")
-                break
+        if max_weight > 30:
+            issues.append("CONCENTRATION_RISK")
         
         # Check diversification
         if len(current_holdings) < 5:
@@ -215,11 +253,12 @@ class StrandPortfolioAnalysisAgent:
             "totalAssets": round(total_assets, 2),
             "totalInvested": round(total_invested, 2),
             "cashSavings": round(cash_savings, 2)
-        }
+        }, max_weight
     
     # ==================== MODULE 3: HEALTH SCORE CALCULATOR ====================
     
-    def calculate_health_score(self, allocation_analysis: Dict, holdings: List[Dict]) -> Dict:
+    def calculate_health_score(self, allocation_analysis: Dict, holdings: List[Dict],
+                               max_position_weight: float) -> Dict:
         """
         Calculate portfolio health score (0-100)
         
@@ -246,16 +285,15 @@ class StrandPortfolioAnalysisAgent:
         })
         
         # Factor 2: Concentration risk (15 points max)
-        max_holding = max([h.get('portfolioWeight', 0) for h in holdings], default=0)
-        if max_holding > 50:
+        if max_position_weight > 50:
             concentration_penalty = 15
-            reason = f"One position is {max_holding}% (very high)"
-        elif max_holding > 30:
+            reason = f"One position is {max_position_weight}% (very high)"
+        elif max_position_weight > 30:
             concentration_penalty = 10
-            reason = f"One position is {max_holding}% (high)"
+            reason = f"One position is {max_position_weight}% (high)"
         else:
             concentration_penalty = 0
-            reason = f"Largest position is {max_holding}% (acceptable)"
+            reason = f"Largest position is {max_position_weight}% (acceptable)"
         
         score -= concentration_penalty
         breakdown.append({
@@ -312,16 +350,7 @@ class StrandPortfolioAnalysisAgent:
         score = max(0, min(100, round(score, 0)))
         
         # Assign grade
-        if score >= 90:
-            grade, status = "A", "EXCELLENT"
-        elif score >= 80:
-            grade, status = "B", "GOOD"
-        elif score >= 70:
-            grade, status = "C", "FAIR"
-        elif score >= 60:
-            grade, status = "D", "POOR"
-        else:
-            grade, status = "F", "CRITICAL"
+        grade, status = HEALTH_GRADES[bisect_right(HEALTH_GRADE_THRESHOLDS, score)]
         
         print(f"\n🏥 Health Score: {score}/100 (Grade {grade})")
         for item in breakdown:
@@ -438,25 +467,7 @@ class StrandPortfolioAnalysisAgent:
                 })
         
         # STEP 2: Reduce concentration
-        for holding in current_holdings:
-            weight = holding.get('portfolioWeight', 0)
-            if weight > 30:
-                # Calculate how much to sell to get to 30%
-                target_weight = 30
-                current_value = holding['currentValue']
-                target_value = total_assets * (target_weight / 100)
-                sell_amount = current_value - target_value
-                
-                if sell_amount > 500:  # Only if meaningful amount
-                    plan['sells'].append({
-                        "action": "SELL",
-                        "symbol": holding['symbol'],
-                        "amount": round(sell_amount, 2),
-                        "estimatedShares": int(sell_amount / holding['currentPrice']),
-                        "reason": f"Reduce concentration from {weight:.0f}% to {target_weight}%",
-                        "priority": "HIGH",
-                        "proceedsAllocation": "Use to buy underweight positions"
-                    })
+        plan['sells'] = list(self.iter_concentration_sells(current_holdings, total_assets))
         
         # Generate summary
         total_to_deploy = sum(item['amount'] for item in plan['cashDeployment'])
@@ -482,6 +493,36 @@ class StrandPortfolioAnalysisAgent:
         
         return plan
     
+    def iter_concentration_sells(self, current_holdings: List[Dict], total_assets: float,
+                                 target_weight: float = 30) -> Iterator[Dict]:
+        """
+        Yield SELL instructions for positions above the concentration limit
+        
+        Instructions are produced one at a time so streaming consumers can emit
+        the first trade before every holding has been checked.
+        
+        Yields:
+            Dict with action, symbol, amount, estimatedShares, reason
+        """
+        target_value = total_assets * (target_weight / 100)
+        
+        for holding in current_holdings:
+            weight = holding.get('portfolioWeight', 0)
+            if weight > target_weight:
+                # Calculate how much to sell to get to the target weight
+                sell_amount = holding['currentValue'] - target_value
+                
+                if sell_amount > 500:  # Only if meaningful amount
+                    yield {
+                        "action": "SELL",
+                        "symbol": holding['symbol'],
+                        "amount": round(sell_amount, 2),
+                        "estimatedShares": int(sell_amount / holding['currentPrice']),
+                        "reason": f"Reduce concentration from {weight:.0f}% to {target_weight}%",
+                        "priority": "HIGH",
+                        "proceedsAllocation": "Use to buy underweight positions"
+                    }
+    
     # ==================== MODULE 5: PERFORMANCE ANALYZER ====================
     
     def analyze_performance(self, holdings: List[Dict], user_profile: Dict) -> Dict:
@@ -499,22 +540,10 @@ class StrandPortfolioAnalysisAgent:
         
         model_name = user_profile.get('modelPortfolio', 'Moderate')
         
-        # Benchmark returns (example - would fetch actual data)
-        benchmark_returns = {
-            "Conservative": {"ytd": 5.2, "name": "30/60 Conservative Portfolio"},
-            "ModeratelyConservative": {"ytd": 6.8, "name": "45/45 Moderate-Conservative Portfolio"},
-            "Moderate": {"ytd": 8.5, "name": "60/30 Moderate Portfolio"},
-            "ModeratelyAggressive": {"ytd": 10.2, "name": "75/20 Moderate-Aggressive Portfolio"},
-            "Aggressive": {"ytd": 11.8, "name": "85/10 Aggressive Portfolio"}
-        }
-        
-        benchmark = benchmark_returns.get(model_name, benchmark_returns['Moderate'])
-        
-        # Calculate user's return (simplified - just use current data)
-        # In production, you'd compare initial investment vs current value over time
-        total_value = sum(h['currentValue'] for h in holdings)
+        benchmark = BENCHMARK_RETURNS.get(model_name, BENCHMARK_RETURNS['Moderate'])
         
         # Placeholder calculation
+        # In production, you'd compare initial investment vs current value over time
         user_return = 0.0  # Would calculate from historical data
         
         attribution = [
@@ -639,8 +668,8 @@ class StrandPortfolioAnalysisAgent:
             })
         
         # Sort by priority
-        priority_rank = {"HIGH": 1, "MEDIUM": 2, "LOW": 3}
-        recommendations.sort(key=lambda x: priority_rank.get(x['priority'], 99))
+        rank = PRIORITY_RANK.get
+        recommendations.sort(key=lambda x: rank(x['priority'], 99))
         
         print(f"\n💡 Generated {len(recommendations)} recommendations")
         
@@ -648,13 +677,14 @@ class StrandPortfolioAnalysisAgent:
     
     # ==================== MAIN ORCHESTRATION METHOD ====================
     
-    def analyze_portfolio(self, user_email: str, market_data: Dict) -> Dict:
+    def analyze_portfolio(self, user_email: str, market_data: Dict, user_profile: Optional[Dict] = None) -> Dict:
         """
         Main method - orchestrates all 6 modules
         
         Args:
             user_email: User's email address
             market_data: Output from StrandMarketDataAgent
+            user_profile: Pre-fetched profile (from get_user_profile); fetched here if omitted
         
         Returns:
             Complete analysis with recommendations
@@ -672,8 +702,9 @@ class StrandPortfolioAnalysisAgent:
                     'error': 'Invalid market data provided'
                 }
             
-            # Get user profile from DynamoDB
-            user_profile = self.get_user_profile(user_email)
+            # Get user profile from DynamoDB unless the caller already has it
+            if user_profile is None:
+                user_profile = self.get_user_profile(user_email)
             if not user_profile:
                 return {
                     'success': False,
@@ -687,10 +718,10 @@ class StrandPortfolioAnalysisAgent:
             model_name, target_model = self.select_model_portfolio(user_profile)
             
             # MODULE 2: Analyze allocation
-            allocation_analysis = self.analyze_allocation(holdings, target_model, cash_savings)
+            allocation_analysis, max_position_weight = self.analyze_allocation(holdings, target_model, cash_savings)
             
             # MODULE 3: Calculate health score
-            health_score = self.calculate_health_score(allocation_analysis, holdings)
+            health_score = self.calculate_health_score(allocation_analysis, holdings, max_position_weight)
             
             # MODULE 4: Generate rebalancing plan
             rebalancing_plan = self.generate_rebalancing_plan(
@@ -723,7 +754,7 @@ class StrandPortfolioAnalysisAgent:
             # Return complete analysis
             return {
                 'success': True,
-                'timestamp': datetime.utcnow().isoformat(),
+                'timestamp': datetime.now(timezone.utc).isoformat(),
                 'userId': user_email,
                 
                 'portfolioHealth': health_score,
@@ -777,16 +808,19 @@ class StrandPortfolioAnalysisAgent:
             return None
 
 
-def create_portfolio_agent():
+def create_portfolio_agent(dynamodb=None):
     """
     Factory function to create Strand Portfolio Analysis Agent
     
+    Args:
+        dynamodb: Optional boto3 DynamoDB resource to share instead of creating one
+    
     Returns:
         StrandPortfolioAnalysisAgent instance
     """
     print("🏭 [Factory] Creating Strand Portfolio Analysis Agent...")
     
-    agent = StrandPortfolioAnalysisAgent()
+    agent = StrandPortfolioAnalysisAgent(dynamodb=dynamodb)
     
     print("✅ [Factory] Strand Portfolio Analysis Agent created successfully")
     return agent
@@ -1,8 +1,7 @@
 import os
 from typing import Dict, Any, Optional, List
 from anthropic import AnthropicBedrock
-from datetime import datetime
-import json
+from datetime import datetime, timezone
 
 
 class StrandOrchestrator:
@@ -11,34 +10,10 @@ class StrandOrchestrator:
     Uses AWS Bedrock for Claude access
     """
     
-    def __init__(self, tools: Dict[str, Any]):
-        """
-        Initialize the orchestrator with AWS Bedrock
-        
-        Args:
-            tools: Dictionary of available tools (from strand_tools.py)
-        """
-        self.tools = tools
-        
-        # Initialize AWS Bedrock client
-        try:
-            self.client = AnthropicBedrock(
-                aws_region=os.getenv('AWS_REGION', 'us-east-1'),
-                aws_access_key=os.getenv('AWS_ACCESS_KEY_ID'),
-                aws_secret_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
-                aws_session_token=os.getenv('AWS_SESSION_TOKEN')
-            )
-            print("✅ Strand Orchestrator initialized with AWS Bedrock")
-        except Exception as e:
-            print(f"❌ Failed to initialize Bedrock: {e}")
-            raise
-        
-        # Conversation memory
-        self.conversation_history: Dict[str, List[Dict]] = {}
+    # Bedrock model ID shared by every Claude call
+    MODEL_ID = "anthropic.claude-sonnet-4-20250514-v1:0"
     
-    def _get_system_prompt(self) -> str:
-        """Get the system prompt for Claude"""
-        return """You are WealthWise AI, an expert robo-advisor and portfolio analyst.
+    SYSTEM_PROMPT = """You are WealthWise AI, an expert robo-advisor and portfolio analyst.
 
 Your role is to:
 1. Analyze user portfolios and provide data-driven insights
@@ -66,6 +41,35 @@ Example tone:
 "Your portfolio health score is 67/100 (Grade D). Think of it like a car that needs maintenance - it'll still run, but you're risking bigger problems down the road. The good news? We can fix this with a few simple moves."
 """
     
+    def __init__(self, tools: Dict[str, Any]):
+        """
+        Initialize the orchestrator with AWS Bedrock
+        
+        Args:
+            tools: Dictionary of available tools (from strand_tools.py)
+        """
+        self.tools = tools
+        
+        # Initialize AWS Bedrock client
+        try:
+            self.client = AnthropicBedrock(
+                aws_region=os.getenv('AWS_REGION', 'us-east-1'),
+                aws_access_key=os.getenv('AWS_ACCESS_KEY_ID'),
+                aws_secret_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
+                aws_session_token=os.getenv('AWS_SESSION_TOKEN')
+            )
+            print("✅ Strand Orchestrator initialized with AWS Bedrock")
+        except Exception as e:
+            print(f"❌ Failed to initialize Bedrock: {e}")
+            raise
+        
+        # Conversation memory
+        self.conversation_history: Dict[str, List[Dict]] = {}
+    
+    def _get_system_prompt(self) -> str:
+        """Get the system prompt for Claude"""
+        return self.SYSTEM_PROMPT
+    
     async def chat(self, user_id: str, message: str, 
                    force_refresh: bool = False) -> Dict[str, Any]:
         """
@@ -174,7 +178,7 @@ Example tone:
                 'analysis': analysis,
                 'userProfile': user_profile
             },
-            'timestamp': datetime.utcnow().isoformat()
+            'timestamp': datetime.now(timezone.utc).isoformat()
         }
     
     async def _generate_explanation(self, user_id: str, message: str,
@@ -206,7 +210,7 @@ Remember: Use analogies, be conversational, and focus on what they should DO, no
         
         # Call Claude via Bedrock
         response = self.client.messages.create(
-            model="anthropic.claude-sonnet-4-20250514-v1:0",  # Bedrock model ID
+            model=self.MODEL_ID,
             max_tokens=2000,
             system=self._get_system_prompt(),
             messages=messages
@@ -225,7 +229,7 @@ Remember: Use analogies, be conversational, and focus on what they should DO, no
         messages = history + [{"role": "user", "content": message}]
         
         response = self.client.messages.create(
-            model="anthropic.claude-sonnet-4-20250514-v1:0",
+            model=self.MODEL_ID,
             max_tokens=1500,
             system=self._get_system_prompt(),
             messages=messages
@@ -236,7 +240,7 @@ Remember: Use analogies, be conversational, and focus on what they should DO, no
         return {
             'success': True,
             'response': text,
-            'timestamp': datetime.utcnow().isoformat()
+            'timestamp': datetime.now(timezone.utc).isoformat()
         }
     
     def _build_context(self, market_data: Dict, analysis: Dict, 
@@ -293,5 +297,5 @@ Remember: Use analogies, be conversational, and focus on what they should DO, no
             'user_id': user_id,
             'message_count': len(history),
             'last_message': history[-1] if history else None,
-            'conversation_started': datetime.utcnow().isoformat()
+            'conversation_started': datetime.now(timezone.utc).isoformat()
         }
\ No newline at end of file
@@ -2,9 +2,10 @@
 import os
 import json
 import boto3
+from functools import lru_cache
 from typing import Dict, Any, List
 from decimal import Decimal
-from datetime import datetime
+from datetime import datetime, timezone
 from dotenv import load_dotenv
 from strands import Agent
 from strands.models import BedrockModel
@@ -16,6 +17,11 @@ bedrock_client = boto3.client(
     region_name=os.getenv('AWS_REGION', 'us-east-1')
 )
 
+# Annuity factors ((1+r)^n - 1) / r for a 12% SIP return, fixed for every request
+SIP_ANNUITY_FACTOR_10Y = (pow(1.12, 10) - 1) / 0.12
+SIP_ANNUITY_FACTOR_20Y = (pow(1.12, 20) - 1) / 0.12
+
+
 def convert_decimal_to_float(obj):
     """Convert Decimal objects to float for JSON serialization"""
     if isinstance(obj, list):
@@ -58,6 +64,14 @@ def parse_investment_horizon(horizon_str):
         return 5  # Default fallback
 
 
+def holdings_value(holdings: List[Dict[str, Any]]) -> float:
+    """Sum quantity * avgPrice across a list of holdings"""
+    total = 0.0
+    for h in holdings:
+        total += float(h.get('quantity', 0)) * float(h.get('avgPrice', 0))
+    return total
+
+
 def analyze_market_context(market_data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Analyze current market conditions to contextualize recommendations
@@ -70,7 +84,7 @@ def analyze_market_context(market_data: Dict[str, Any]) -> Dict[str, Any]:
     
     analysis = {
         'market_available': True,
-        'timestamp': market_data.get('timestamp', datetime.now().isoformat()),
+        'timestamp': market_data.get('timestamp') or datetime.now(timezone.utc).isoformat(),
         'indices': {},
         'volatility': {},
         'sentiment': 'neutral'
@@ -78,8 +92,10 @@ def analyze_market_context(market_data: Dict[str, Any]) -> Dict[str, Any]:
     
     # Analyze indices
     indices = market_data.get('indices', {})
+    total_change = 0
     for idx_name, idx_data in indices.items():
         change_pct = float(idx_data.get('changePercent', 0))
+        total_change += change_pct
         analysis['indices'][idx_name] = {
             'value': float(idx_data.get('value', 0)),
             'change': float(idx_data.get('change', 0)),
@@ -98,7 +114,7 @@ def analyze_market_context(market_data: Dict[str, Any]) -> Dict[str, Any]:
         }
     
     # Overall market sentiment
-    avg_change = sum(idx['changePercent'] for idx in analysis['indices'].values()) / len(analysis['indices']) if analysis['indices'] else 0
+    avg_change = total_change / len(analysis['indices']) if analysis['indices'] else 0
     analysis['sentiment'] = 'bullish' if avg_change > 0.5 else 'bearish' if avg_change < -0.5 else 'neutral'
     
     return analysis
@@ -175,18 +191,22 @@ def generate_recommendations_with_calculations(
     total_holdings = len(stocks) + len(bonds) + len(etfs)
     
     # Calculate portfolio value and allocation
-    stock_value = sum(float(s.get('quantity', 0)) * float(s.get('avgPrice', 0)) for s in stocks)
-    bond_value = sum(float(b.get('quantity', 0)) * float(b.get('avgPrice', 0)) for b in bonds)
-    etf_value = sum(float(e.get('quantity', 0)) * float(e.get('avgPrice', 0)) for e in etfs)
+    stock_value = holdings_value(stocks)
+    bond_value = holdings_value(bonds)
+    etf_value = holdings_value(etfs)
     
     total_invested = stock_value + bond_value + etf_value
     total_value = total_invested + cash_savings
     
-    # Calculate allocation percentages
-    stock_percent = (stock_value / total_value * 100) if total_value > 0 else 0
-    bond_percent = (bond_value / total_value * 100) if total_value > 0 else 0
-    etf_percent = (etf_value / total_value * 100) if total_value > 0 else 0
-    cash_percent = (cash_savings / total_value * 100) if total_value > 0 else 100
+    # Calculate allocation percentages (an empty portfolio counts as all cash)
+    if total_value > 0:
+        stock_percent = stock_value / total_value * 100
+        bond_percent = bond_value / total_value * 100
+        etf_percent = etf_value / total_value * 100
+        cash_percent = cash_savings / total_value * 100
+    else:
+        stock_percent = bond_percent = etf_percent = 0
+        cash_percent = 100
     
     portfolio_metadata = {
         'total_value': total_value,
@@ -511,8 +531,8 @@ For your {user_metadata['investment_horizon']} year horizon, keeping this cash i
         recommended_sip = max(5000, total_value * 0.02, user_metadata['annual_income'] * 0.10 / 12 if user_metadata['annual_income'] > 0 else 5000)
         recommended_sip = min(recommended_sip, 50000)  # Cap at 50k
         
-        future_value_10y = recommended_sip * 12 * ((pow(1.12, 10) - 1) / 0.12) * 1.12
-        future_value_20y = recommended_sip * 12 * ((pow(1.12, 20) - 1) / 0.12) * 1.12
+        future_value_10y = recommended_sip * 12 * SIP_ANNUITY_FACTOR_10Y * 1.12
+        future_value_20y = recommended_sip * 12 * SIP_ANNUITY_FACTOR_20Y * 1.12
         
         total_invested_10y = recommended_sip * 120
         gains_10y = future_value_10y - total_invested_10y
@@ -671,22 +691,10 @@ This 5-minute assessment can optimize your portfolio for YOUR unique situation,
     }
 
 
-def get_recommendation_agent():
-    """
-    Initialize Strand Agent for AI-powered insights with XAI focus
-    
-    This is the SYSTEM PROMPT that guides the AI agent's behavior.
-    Modify this prompt to change how the AI generates insights.
-    """
-    bedrock_model = BedrockModel(
-        model_id="us.anthropic.claude-3-5-sonnet-20241022-v2:0",
-        client=bedrock_client
-    )
-    
-    # ============================================================================
-    # AGENT SYSTEM PROMPT - Customize AI Behavior Here
-    # ============================================================================
-    system_prompt = """You are WealthWise AI, an expert financial advisor focused on Explainable AI (XAI).
+# ============================================================================
+# AGENT SYSTEM PROMPT - Customize AI Behavior Here
+# ============================================================================
+RECOMMENDATION_AGENT_SYSTEM_PROMPT = """You are WealthWise AI, an expert financial advisor focused on Explainable AI (XAI).
 
 Your role is to provide a brief, personalized summary (4-5 sentences) that highlights:
 1. WHO the user is (name, age, key characteristics)
@@ -720,10 +728,29 @@ Tone Guidelines:
 - Data-driven and specific
 - Clear about cause-and-effect relationships
 - Transparent about assumptions and reasoning"""
+
+
+@lru_cache(maxsize=1)
+def get_recommendation_model():
+    """Build the Bedrock model once per process on the shared bedrock_client"""
+    return BedrockModel(
+        model_id="us.anthropic.claude-3-5-sonnet-20241022-v2:0",
+        client=bedrock_client
+    )
+
+
+def get_recommendation_agent():
+    """
+    Initialize Strand Agent for AI-powered insights with XAI focus
+    
+    RECOMMENDATION_AGENT_SYSTEM_PROMPT (above) guides the AI agent's behavior.
+    Modify that prompt to change how the AI generates insights.
+    """
+    bedrock_model = get_recommendation_model()
     
     agent = Agent(
         model=bedrock_model,
-        system_prompt=system_prompt
+        system_prompt=RECOMMENDATION_AGENT_SYSTEM_PROMPT
     )
     
     return agent
@@ -849,7 +876,7 @@ Make it conversational, encouraging, and crystal clear about the reasoning behin
         response = {
             'success': True,
             'user_email': user_email,
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
             
             # Core recommendations with XAI
             'recommendations': structured_recs['recommendations'],
@@ -899,7 +926,7 @@ Make it conversational, encouraging, and crystal clear about the reasoning behin
         return {
             'success': False,
             'error': str(e),
-            'timestamp': datetime.now().isoformat()
+            'timestamp': datetime.now(timezone.utc).isoformat()
         }
 
 
@@ -1,14 +1,16 @@
 import os
 import json
+from bisect import bisect_right
+from functools import lru_cache
 import boto3
 from typing import Dict, Any
+from datetime import datetime, timezone
 from decimal import Decimal
 from dotenv import load_dotenv
 
 # ✅ CORRECT STRAND SDK IMPORTS
 from strands import Agent, tool
 from strands.models import BedrockModel
-from anthropic import Anthropic
 
 load_dotenv()
 
@@ -36,6 +38,41 @@ def convert_floats_to_decimal(obj):
 
 # ==================== RISK CALCULATION LOGIC ====================
 
+# Investment horizon -> (horizon factor, representative years)
+HORIZON_FACTORS = {"1-3": (0.3, 2), "3-5": (0.5, 4), "5-10": (0.7, 7.5), "10+": (0.9, 15)}
+
+# Risk tolerance -> tolerance index
+TOLERANCE_FACTORS = {"conservative": 0.3, "moderate": 0.6, "aggressive": 0.9}
+
+# Asset name keyword -> risk weight (first matching keyword wins)
+ASSET_RISK_WEIGHTS = {
+    "tech": 0.85, "technology": 0.85, "crypto": 1.0,
+    "stocks": 0.75, "growth": 0.8, "etf": 0.6, "etfs": 0.6,
+    "bonds": 0.2, "cash": 0.1, "healthcare": 0.5,
+    "real estate": 0.45, "finance": 0.65, "consumer": 0.6
+}
+
+# Scaled score cut-offs (< 4 Conservative, < 7 Moderate, else Aggressive)
+RISK_LEVEL_THRESHOLDS = (4, 7)
+RISK_LEVELS = (
+    ("Conservative", "Focus on capital preservation with bonds and dividend stocks"),
+    ("Moderate", "Balance growth and stability with diversified portfolio"),
+    ("Aggressive", "Pursue maximum growth with higher volatility tolerance"),
+)
+
+def asset_risk_weight(name: str) -> float:
+    """Risk weight for a lowercased asset name, 0.5 when no keyword matches"""
+    # Most allocation names are exactly one of the keywords
+    weight = ASSET_RISK_WEIGHTS.get(name)
+    if weight is not None:
+        return weight
+
+    for key, val in ASSET_RISK_WEIGHTS.items():
+        if key in name:
+            return val
+    return 0.5
+
+
 def compute_risk_score_logic(age: int, horizon: str, tolerance: str,
                              allocation: list = None, monthly_contribution: float = 0) -> dict:
     """
@@ -46,35 +83,23 @@ def compute_risk_score_logic(age: int, horizon: str, tolerance: str,
     age_factor = 0.6 if age < 30 else (0.5 if age < 45 else (0.4 if age < 60 else 0.3))
 
     # Horizon Factor
-    horizon_map = {"1-3": (0.3, 2), "3-5": (0.5, 4), "5-10": (0.7, 7.5), "10+": (0.9, 15)}
-    horizon_factor, horizon_years = horizon_map.get(horizon, (0.9, 15))
+    horizon_factor, horizon_years = HORIZON_FACTORS.get(horizon, (0.9, 15))
 
-    # Tolerance Factor
-    tolerance_map = {"conservative": 0.3, "moderate": 0.6, "aggressive": 0.9}
-    tolerance_index = tolerance_map.get(tolerance.lower(), 0.6)
+    # Tolerance Factor (onboarding stores it lowercase already; normalize only on a miss)
+    tolerance_index = TOLERANCE_FACTORS.get(tolerance)
+    if tolerance_index is None:
+        tolerance_index = TOLERANCE_FACTORS.get(tolerance.lower(), 0.6)
 
     # Allocation Risk
     allocation_risk = 0.5
     if allocation and len(allocation) > 0:
-        risk_weights = {
-            "tech": 0.85, "technology": 0.85, "crypto": 1.0,
-            "stocks": 0.75, "growth": 0.8, "etf": 0.6, "etfs": 0.6,
-            "bonds": 0.2, "cash": 0.1, "healthcare": 0.5,
-            "real estate": 0.45, "finance": 0.65, "consumer": 0.6
-        }
-
         total_allocation_risk = 0
         total_percentage = 0
 
         for asset in allocation:
             name = asset.get("name", "").lower()
             percentage = float(asset.get("percentage", 0))
-            asset_risk = 0.5
-
-            for key, val in risk_weights.items():
-                if key in name:
-                    asset_risk = val
-                    break
+            asset_risk = asset_risk_weight(name)
 
             total_allocation_risk += asset_risk * percentage
             total_percentage += percentage
@@ -92,25 +117,24 @@ def compute_risk_score_logic(age: int, horizon: str, tolerance: str,
     # Weighted Risk Score Calculation
     w_age, w_horizon, w_tol, w_alloc, w_contrib = 0.15, 0.25, 0.35, 0.15, 0.10
 
+    # Each weighted term is computed once and reused for the breakdown below
+    age_contribution = w_age * age_factor
+    horizon_contribution = w_horizon * horizon_factor
+    tolerance_contribution = w_tol * tolerance_index
+    allocation_contribution = w_alloc * allocation_risk
+    contribution_contribution = w_contrib * contribution_factor
+
     risk_score = (
-        (w_age * age_factor) +
-        (w_horizon * horizon_factor) +
-        (w_tol * tolerance_index) +
-        (w_alloc * allocation_risk) +
-        (w_contrib * contribution_factor)
+        age_contribution +
+        horizon_contribution +
+        tolerance_contribution +
+        allocation_contribution +
+        contribution_contribution
     )
 
     scaled_score = round(risk_score * 10, 1)
 
-    if scaled_score < 4:
-        label = "Conservative"
-        recommendation = "Focus on capital preservation with bonds and dividend stocks"
-    elif scaled_score < 7:
-        label = "Moderate"
-        recommendation = "Balance growth and stability with diversified portfolio"
-    else:
-        label = "Aggressive"
-        recommendation = "Pursue maximum growth with higher volatility tolerance"
+    label, recommendation = RISK_LEVELS[bisect_right(RISK_LEVEL_THRESHOLDS, scaled_score)]
 
     return {
         "riskScore": scaled_score,
@@ -135,56 +159,72 @@ def compute_risk_score_logic(age: int, horizon: str, tolerance: str,
             "contribution": w_contrib
         },
         "breakdown": {
-            "ageContribution": round(w_age * age_factor * 10, 2),
-            "horizonContribution": round(w_horizon * horizon_factor * 10, 2),
-            "toleranceContribution": round(w_tol * tolerance_index * 10, 2),
-            "allocationContribution": round(w_alloc * allocation_risk * 10, 2),
-            "contributionContribution": round(w_contrib * contribution_factor * 10, 2)
+            "ageContribution": round(age_contribution * 10, 2),
+            "horizonContribution": round(horizon_contribution * 10, 2),
+            "toleranceContribution": round(tolerance_contribution * 10, 2),
+            "allocationContribution": round(allocation_contribution * 10, 2),
+            "contributionContribution": round(contribution_contribution * 10, 2)
         }
     }
 
 
 # ==================== STRAND TOOLS ====================
 
-@tool
-def get_risk_recommendation(risk_score: float, risk_label: str) -> str:
-    """
-    Get personalized investment recommendations based on risk score.
-
-    Provides actionable advice on:
-    - Appropriate asset allocation
-    - Investment strategies
-    - Risk management approaches
-    """
-    recommendations = {
-        "Conservative": """For your conservative profile:
+# Risk label -> allocation guidance returned by get_risk_recommendation
+RISK_RECOMMENDATIONS = {
+    "Conservative": """For your conservative profile:
 - Asset Mix: 70% bonds, 20% dividend stocks, 10% cash
 - Focus: Capital preservation and stable income
 - Strategy: Invest in high-quality bonds and blue-chip dividend stocks
 - Risk Management: Maintain 6-12 months emergency fund""",
 
-        "Moderate": """For your moderate profile:
+    "Moderate": """For your moderate profile:
 - Asset Mix: 60% stocks, 30% bonds, 10% cash/alternatives
 - Focus: Balanced growth with downside protection
 - Strategy: Diversify across sectors and asset classes
 - Risk Management: Regular rebalancing and dollar-cost averaging""",
 
-        "Aggressive": """For your aggressive profile:
+    "Aggressive": """For your aggressive profile:
 - Asset Mix: 80% stocks, 15% alternatives, 5% bonds
 - Focus: Maximum long-term growth
 - Strategy: Growth stocks, emerging markets, sector concentration
 - Risk Management: Long-term hold strategy, avoid panic selling"""
-    }
+}
+
 
-    return recommendations.get(risk_label, "Please consult with a financial advisor for personalized recommendations.")
+@tool
+def get_risk_recommendation(risk_score: float, risk_label: str) -> str:
+    """
+    Get personalized investment recommendations based on risk score.
+
+    Provides actionable advice on:
+    - Appropriate asset allocation
+    - Investment strategies
+    - Risk management approaches
+    """
+    return RISK_RECOMMENDATIONS.get(risk_label, "Please consult with a financial advisor for personalized recommendations.")
 
 
 # ==================== STRAND AGENT ====================
 
-def get_risk_agent():
+RISK_AGENT_SYSTEM_PROMPT = """You are the Risk Profile Agent for WealthWise AI, a robo-advisor platform.
+
+Your role:
+- Explain risk scores in simple, personalized language
+- Help investors understand what their risk profile means
+- Be encouraging and actionable (2-3 sentences max)
+- Focus on how specific factors combine to create their profile
+
+Always be supportive and explain complex concepts in everyday terms."""
+
+RISK_AGENT_TOOLS = (get_risk_recommendation,)
+
+
+@lru_cache(maxsize=1)
+def get_risk_model():
     """
-    Initialize Strand Agent using IAM role credentials (EC2 instance profile)
-    This creates a new agent instance with automatic credential management
+    Build the Bedrock model once per process using IAM role credentials
+    (boto3 clients are thread-safe, so the model can be shared by every agent)
     """
     # ✅ Use IAM role - boto3 automatically gets credentials from EC2 instance metadata
     bedrock_client = boto3.client(
@@ -193,24 +233,22 @@ def get_risk_agent():
     )
 
     # Create Bedrock model with IAM role credentials
-    bedrock_model = BedrockModel(
+    return BedrockModel(
         model_id="us.anthropic.claude-3-5-sonnet-20241022-v2:0",
         client=bedrock_client,  # ✅ explicitly pass the client
     )
 
+
+def get_risk_agent():
+    """
+    Initialize Strand Agent using IAM role credentials (EC2 instance profile)
+    This creates a new agent instance (fresh conversation) on the shared model
+    """
     # Initialize Strand Agent with the configured model
     agent = Agent(
-        model=bedrock_model,
-        tools=[get_risk_recommendation],
-        system_prompt="""You are the Risk Profile Agent for WealthWise AI, a robo-advisor platform.
-
-Your role:
-- Explain risk scores in simple, personalized language
-- Help investors understand what their risk profile means
-- Be encouraging and actionable (2-3 sentences max)
-- Focus on how specific factors combine to create their profile
-
-Always be supportive and explain complex concepts in everyday terms."""
+        model=get_risk_model(),
+        tools=list(RISK_AGENT_TOOLS),
+        system_prompt=RISK_AGENT_SYSTEM_PROMPT
     )
 
     return agent
@@ -338,7 +376,7 @@ Explain what this score means for them personally and how their specific factors
             **risk_result,
             'rationale': rationale,
             'agentType': 'Strand SDK',
-            'timestamp': __import__('datetime').datetime.utcnow().isoformat()
+            'timestamp': datetime.now(timezone.utc).isoformat()
         }
 
         # Convert all floats to Decimal
@@ -1,6 +1,19 @@
 
+import asyncio
+import atexit
+import hashlib
+import hmac
+import logging
 import os
+import queue
+import random
+import secrets
 import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from logging.handlers import QueueHandler, QueueListener
 from dotenv import load_dotenv
 
 
@@ -13,14 +26,19 @@ print()
 
 
 
-from fastapi import FastAPI, HTTPException, status, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Request, Response, status, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, EmailStr
-from typing import List, Optional, Dict, Any
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, ConfigDict, EmailStr, StringConstraints
+from typing import Annotated, List, Optional, Dict, Any
 import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
 from datetime import datetime, timezone
 from decimal import Decimal
 import bcrypt
+import orjson
 
 # Import new Strand SDK agents
 from agents.market_agent import create_market_agent
@@ -34,9 +52,42 @@ from agents.strand_risk_agent import analyze_user_risk_profile
 # Import Q Business service
 from services.qbusiness_service import SmartQBusinessService
 
+def _orjson_default(obj):
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        # DynamoDB string/number sets
+        return list(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+class WealthWiseJSONResponse(ORJSONResponse):
+    """orjson-encoded responses that also accept DynamoDB Decimals"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            default=_orjson_default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+
+async def verify_dynamodb_connection():
+    tables = await run_in_threadpool(client.list_tables)
+    print(f"✅ DynamoDB connected! Found {len(tables['TableNames'])} tables")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Network checks run once the server is starting rather than at import,
+    # so importing the module (workers, tooling) doesn't wait on DynamoDB.
+    # The table listing is a dev sanity check; opt in with VERIFY_TABLES_ON_STARTUP=1
+    if os.getenv("VERIFY_TABLES_ON_STARTUP") == "1":
+        await verify_dynamodb_connection()
+    yield
+
 app = FastAPI(
     title="WealthWise AI Robo-Advisor API (Strand-Powered)",
-    version="4.0.0-strand"
+    version="4.0.0-strand",
+    default_response_class=WealthWiseJSONResponse,
+    lifespan=lifespan
 )
 
 # CORS Configuration
@@ -48,6 +99,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ==================== LOGGING ====================
+# Request-path logging goes through a queue so the endpoint only enqueues the
+# record; the stream write happens on the listener's background thread.
+logger = logging.getLogger("wealthwise.api")
+logger.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+logger.propagate = False
+
+_log_queue = queue.SimpleQueue()
+logger.addHandler(QueueHandler(_log_queue))
+
+_log_stream_handler = logging.StreamHandler()
+_log_stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+_log_listener = QueueListener(_log_queue, _log_stream_handler)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
 
 # Initialize DynamoDB
 print("🔌 Initializing DynamoDB connection...")
@@ -58,7 +125,22 @@ print("🔌 Initializing DynamoDB connection...")
 #     aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
 #     aws_session_token=os.getenv('AWS_SESSION_TOKEN')
 # )
-dynamodb = boto3.resource("dynamodb", region_name=os.getenv("AWS_REGION", "us-east-1"))
+
+# One pooled, keep-alive connection config shared by every table call; the
+# default pool of 10 connections is easily exhausted once calls run in threads
+DYNAMODB_CONFIG = Config(
+    max_pool_connections=int(os.getenv("DYNAMODB_MAX_POOL_CONNECTIONS", "64")),
+    tcp_keepalive=True,
+    connect_timeout=2,
+    read_timeout=5,
+    retries={'max_attempts': 5, 'mode': 'adaptive'}
+)
+
+dynamodb = boto3.resource(
+    "dynamodb",
+    region_name=os.getenv("AWS_REGION", "us-east-1"),
+    config=DYNAMODB_CONFIG
+)
 
 # client = boto3.client(
 #     'dynamodb',
@@ -68,12 +150,9 @@ dynamodb = boto3.resource("dynamodb", region_name=os.getenv("AWS_REGION", "us-ea
 #     aws_session_token=os.getenv('AWS_SESSION_TOKEN')
 # )
 
-# Using default credential chain (IAM role)
-client = boto3.client("dynamodb", region_name=os.getenv("AWS_REGION", "us-east-1"))
-
-
-tables = client.list_tables()
-print(f"✅ DynamoDB connected! Found {len(tables['TableNames'])} tables")
+# Using default credential chain (IAM role); reuse the resource's client so
+# both share one connection pool
+client = dynamodb.meta.client
 
 users_table = dynamodb.Table('WealthWiseUsers')
 portfolios_table = dynamodb.Table('WealthWisePortfolios')
@@ -81,8 +160,9 @@ portfolios_table = dynamodb.Table('WealthWisePortfolios')
 # Initialize New Strand SDK Agents
 print()
 print("� Initiializing Strand SDK Agents...")
-market_agent = create_market_agent()
-portfolio_agent = create_portfolio_agent()
+# Agents share the pooled DynamoDB resource instead of opening their own
+market_agent = create_market_agent(dynamodb=dynamodb)
+portfolio_agent = create_portfolio_agent(dynamodb=dynamodb)
 # Note: recommendation and risk are function-based, not class-based
 print("✅ Market and Portfolio agents initialized")
 print("✅ Recommendation and Risk functions available")
@@ -133,12 +213,20 @@ print()
 
 # ==================== PYDANTIC MODELS ====================
 
+# Login only needs the email as a lookup key, so a plain pattern check is enough
+# there; full EmailStr validation stays on onboarding where accounts are created
+LoginEmail = Annotated[str, StringConstraints(pattern=r'^[^@\s]+@[^@\s]+\.[^@\s]+$', max_length=254)]
+
 class Holding(BaseModel):
+    model_config = ConfigDict(extra='forbid', frozen=True)
+
     symbol: str
     quantity: float
     avgPrice: float
 
 class CompleteOnboardingRequest(BaseModel):
+    model_config = ConfigDict(extra='forbid')
+
     userId: str
     name: str
     email: EmailStr
@@ -156,7 +244,9 @@ class CompleteOnboardingRequest(BaseModel):
     timestamp: str
 
 class LoginRequest(BaseModel):
-    email: EmailStr
+    model_config = ConfigDict(extra='forbid')
+
+    email: LoginEmail
     password: str
 
 class ChatRequest(BaseModel):
@@ -170,96 +260,401 @@ class AskRequest(BaseModel):
 
 # ==================== HELPER FUNCTIONS ====================
 
+# Calibration never goes below the cost hashes used before it existed
+BCRYPT_MIN_ROUNDS = 12
+BCRYPT_MAX_ROUNDS = 14
+# Cheap cost the calibration hash is timed at; higher costs are extrapolated
+BCRYPT_CALIBRATION_ROUNDS = 10
+# Range bcrypt.gensalt accepts
+BCRYPT_VALID_ROUNDS = range(4, 32)
+
+def _calibrate_bcrypt_rounds(budget_ms: float) -> int:
+    """Largest cost whose hash time fits the budget on this machine (never below the minimum)"""
+    start = time.perf_counter()
+    bcrypt.hashpw(b'calibration', bcrypt.gensalt(rounds=BCRYPT_CALIBRATION_ROUNDS))
+    base_ms = (time.perf_counter() - start) * 1000
+
+    rounds = BCRYPT_MIN_ROUNDS
+    # Each extra round doubles the work
+    while rounds < BCRYPT_MAX_ROUNDS and base_ms * 2 ** (rounds + 1 - BCRYPT_CALIBRATION_ROUNDS) <= budget_ms:
+        rounds += 1
+    return rounds
+
+def _bcrypt_rounds_from_env() -> int:
+    """BCRYPT_ROUNDS if set (validated), else the calibrated cost for BCRYPT_BUDGET_MS"""
+    raw = os.getenv('BCRYPT_ROUNDS')
+    if raw:
+        try:
+            rounds = int(raw)
+        except ValueError:
+            raise RuntimeError(f"BCRYPT_ROUNDS must be an integer, got {raw!r}") from None
+        if rounds not in BCRYPT_VALID_ROUNDS:
+            raise RuntimeError(
+                f"BCRYPT_ROUNDS must be between {BCRYPT_VALID_ROUNDS.start} and "
+                f"{BCRYPT_VALID_ROUNDS.stop - 1}, got {rounds}"
+            )
+        if rounds < BCRYPT_MIN_ROUNDS:
+            print(f"⚠️  BCRYPT_ROUNDS={rounds} is below the default minimum of {BCRYPT_MIN_ROUNDS}")
+        return rounds
+
+    raw_budget = os.getenv('BCRYPT_BUDGET_MS', '250')
+    try:
+        budget_ms = float(raw_budget)
+    except ValueError:
+        raise RuntimeError(f"BCRYPT_BUDGET_MS must be a number, got {raw_budget!r}") from None
+    return _calibrate_bcrypt_rounds(budget_ms)
+
+# BCRYPT_ROUNDS pins the cost explicitly; otherwise pick the highest cost that
+# keeps a hash within BCRYPT_BUDGET_MS. Existing hashes embed their own cost,
+# so changing this only affects newly created passwords.
+BCRYPT_ROUNDS = _bcrypt_rounds_from_env()
+print(f"🔐 bcrypt cost factor: {BCRYPT_ROUNDS}")
+
+VERIFY_CACHE_TTL_SECONDS = 300
+VERIFY_CACHE_MAX_ENTRIES = 4096
+
+# Per-process key for the cache digests, so a memory dump doesn't expose plain
+# (fast to brute-force) password hashes next to the bcrypt ones
+_VERIFY_CACHE_KEY = secrets.token_bytes(32)
+
+# (hmac(password), passwordHash) -> monotonic time of last successful check.
+# verify_password runs in threadpool workers, so access goes through the lock.
+_verified_passwords: "OrderedDict[tuple, float]" = OrderedDict()
+_verified_passwords_lock = threading.Lock()
+
 def hash_password(password: str) -> str:
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
     return hashed.decode('utf-8')
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+    # Successful checks are remembered for a few minutes, keyed by a keyed
+    # HMAC of the password and the stored hash (a password change therefore
+    # misses), so repeat logins skip the bcrypt work factor. Failures are never
+    # cached, and the plaintext is never kept.
+    password = plain_password.encode('utf-8')
+    cache_key = (hmac.new(_VERIFY_CACHE_KEY, password, hashlib.sha256).digest(), hashed_password)
+
+    with _verified_passwords_lock:
+        verified_at = _verified_passwords.get(cache_key)
+    if verified_at is not None and time.monotonic() - verified_at < VERIFY_CACHE_TTL_SECONDS:
+        return True
+
+    # bcrypt runs outside the lock so concurrent logins don't serialize on it
+    if not bcrypt.checkpw(password, hashed_password.encode('utf-8')):
+        return False
+
+    with _verified_passwords_lock:
+        _verified_passwords.pop(cache_key, None)
+        if len(_verified_passwords) >= VERIFY_CACHE_MAX_ENTRIES:
+            _verified_passwords.popitem(last=False)
+        _verified_passwords[cache_key] = time.monotonic()
+    return True
+
+READ_CACHE_TTL_SECONDS = 30
+READ_CACHE_MAX_ENTRIES = 10000
+
+# Static info may be cached anywhere for a while. Per-user data must be
+# revalidated every time (it changes through PUT /api/portfolio), but an
+# unchanged body is answered with 304 via its ETag.
+STATIC_CACHE_CONTROL = "public, max-age=300"
+PRIVATE_CACHE_CONTROL = "private, no-cache"
+
+# Every user attribute except passwordHash, so profile reads never pull the
+# hash over the wire (riskAnalysis is written by the risk agent)
+USER_PUBLIC_ATTRIBUTES = (
+    'userId', 'email', 'name', 'age', 'riskTolerance', 'investmentGoal',
+    'investmentHorizon', 'monthlyContribution', 'hasPortfolio', 'riskAnalysis',
+    'createdAt', 'updatedAt'
+)
+USER_PROJECTION_NAMES = {f'#a{i}': attr for i, attr in enumerate(USER_PUBLIC_ATTRIBUTES)}
+USER_PROJECTION_EXPRESSION = ', '.join(USER_PROJECTION_NAMES)
+
+# email -> (expires_at, (body, etag)) for the profile/portfolio GET endpoints
+_user_cache: Dict[str, tuple] = {}
+_portfolio_cache: Dict[str, tuple] = {}
+
+def cache_get(cache: Dict[str, tuple], email: str):
+    entry = cache.get(email)
+    if entry is not None and entry[0] > time.monotonic():
+        return entry[1]
+    return None
+
+def cache_put(cache: Dict[str, tuple], email: str, value: Any, ttl: float = READ_CACHE_TTL_SECONDS):
+    cache.pop(email, None)
+    if len(cache) >= READ_CACHE_MAX_ENTRIES:
+        cache.pop(next(iter(cache)), None)
+    cache[email] = (time.monotonic() + ttl, value)
+
+def build_etag_body(payload: Dict) -> tuple:
+    """Serialize payload once and derive its ETag; returns (body, etag)"""
+    body = orjson.dumps(payload, default=_orjson_default)
+    return body, '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+def conditional_json_response(request: Request, body: bytes, etag: str) -> Response:
+    headers = {'ETag': etag, 'Cache-Control': PRIVATE_CACHE_CONTROL}
+    if request.headers.get('if-none-match') == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type='application/json', headers=headers)
+
+MARKET_REPORT_TTL_SECONDS = 30
+
+# email -> (expires_at, successful market report); email -> (in-flight build,
+# write generation it started under)
+_market_report_cache: Dict[str, tuple] = {}
+_market_report_inflight: Dict[str, tuple] = {}
+
+# Portfolio writes are numbered from one process-wide counter, and a report is
+# cached only if its user hasn't written since the build started. The per-user
+# numbers are capped like the read caches: an evicted user is treated as having
+# written at the newest evicted number, which can skip a cache fill but never
+# lets a stale report in.
+_portfolio_write_generation = 0
+_portfolio_last_write: Dict[str, int] = {}
+_portfolio_last_write_floor = 0
+
+def invalidate_market_report(email: str):
+    """Forget the cached report and any in-flight build after a portfolio write"""
+    global _portfolio_write_generation, _portfolio_last_write_floor
+    _portfolio_write_generation += 1
+    # Re-insert so the oldest write is the one evicted
+    _portfolio_last_write.pop(email, None)
+    if len(_portfolio_last_write) >= READ_CACHE_MAX_ENTRIES:
+        _portfolio_last_write_floor = _portfolio_last_write.pop(next(iter(_portfolio_last_write)))
+    _portfolio_last_write[email] = _portfolio_write_generation
+    _market_report_cache.pop(email, None)
+    _market_report_inflight.pop(email, None)
+
+def market_report_is_current(email: str, generation: int) -> bool:
+    """True if email's portfolio hasn't been written since generation was taken"""
+    return _portfolio_last_write.get(email, _portfolio_last_write_floor) <= generation
+
+async def get_market_report_cached(email: str, portfolio: Optional[Dict] = None,
+                                   generation: Optional[int] = None) -> Dict:
+    """Market report for email, shared across endpoints for a short TTL.
+
+    Concurrent callers for the same user await one generate_report run instead
+    of each fanning out to the market data APIs. Failed reports aren't cached.
+    portfolio, when the caller already has the item, saves the agent's own read;
+    generation is _portfolio_write_generation as taken before that read, and a
+    portfolio written since is dropped so the agent reads the current one.
+    """
+    cached = cache_get(_market_report_cache, email)
+    if cached is not None:
+        return cached
+
+    if generation is None or not market_report_is_current(email, generation):
+        portfolio = None
+        generation = _portfolio_write_generation
+
+    entry = _market_report_inflight.get(email)
+    if entry is None:
+        future = asyncio.ensure_future(run_in_threadpool(market_agent.generate_report, email, portfolio))
+        entry = (future, generation)
+        _market_report_inflight[email] = entry
+
+        def _clear_inflight(_, entry=entry):
+            # Only clear our own entry; an update may have replaced it already
+            if _market_report_inflight.get(email) is entry:
+                del _market_report_inflight[email]
+
+        future.add_done_callback(_clear_inflight)
+
+    future, generation = entry
+    # Shield so one client disconnecting doesn't cancel the build for the others
+    report = await asyncio.shield(future)
+    if report.get('success') and market_report_is_current(email, generation):
+        cache_put(_market_report_cache, email, report, ttl=MARKET_REPORT_TTL_SECONDS)
+    return report
+
+async def get_report_and_profile(email: str) -> tuple:
+    """(market report, user profile) for the dashboard and analysis endpoints.
+
+    On a market-report cache hit only the profile is read; otherwise user and
+    portfolio come from one BatchGetItem and the portfolio is handed to the
+    market agent so it doesn't read it again. A missing user or portfolio is a
+    404 here: passing None on would make the agents look the item up again.
+    """
+    cached = cache_get(_market_report_cache, email)
+    if cached is not None:
+        response = await run_in_threadpool(users_table.get_item, Key={'userId': email})
+        if 'Item' not in response:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"User not found: {email}"
+            )
+        return cached, convert_decimal_to_float(response['Item'])
+
+    # Taken before the read so a portfolio write racing it is noticed
+    generation = _portfolio_write_generation
+    user_item, portfolio_item = await run_in_threadpool(fetch_user_and_portfolio, email)
+    if user_item is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"User not found: {email}"
+        )
+    if portfolio_item is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Portfolio not found for user: {email}"
+        )
+
+    report = await get_market_report_cached(email, portfolio_item, generation)
+    return report, convert_decimal_to_float(user_item)
+
+def _convert_leaves(obj, leaf_type, convert):
+    """Copy a dict/list tree, applying convert to every value of exactly leaf_type.
+
+    Walks with an explicit stack instead of recursing per value; containers are
+    shallow-copied once and then patched in place, so the input is untouched.
+    """
+    obj_type = type(obj)
+    if obj_type is leaf_type:
+        return convert(obj)
+    if obj_type is dict:
+        root = dict(obj)
+    elif obj_type is list:
+        root = list(obj)
+    else:
+        return obj
+
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        for key, value in (node.items() if type(node) is dict else enumerate(node)):
+            value_type = type(value)
+            if value_type is leaf_type:
+                node[key] = convert(value)
+            elif value_type is dict:
+                node[key] = child = dict(value)
+                stack.append(child)
+            elif value_type is list:
+                node[key] = child = list(value)
+                stack.append(child)
+    return root
+
+def _float_to_decimal(value: float) -> Decimal:
+    return Decimal(str(value))
 
 def convert_float_to_decimal(obj):
-    if isinstance(obj, float):
-        return Decimal(str(obj))
-    elif isinstance(obj, dict):
-        return {k: convert_float_to_decimal(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [convert_float_to_decimal(item) for item in obj]
-    return obj
+    return _convert_leaves(obj, float, _float_to_decimal)
 
 def convert_decimal_to_float(obj):
-    if isinstance(obj, Decimal):
-        return float(obj)
-    elif isinstance(obj, dict):
-        return {k: convert_decimal_to_float(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [convert_decimal_to_float(item) for item in obj]
-    return obj
+    return _convert_leaves(obj, Decimal, float)
+
+# BatchGetItem hands throttled keys back as UnprocessedKeys; retry those with
+# capped exponential backoff and full jitter, then fall back to GetItem
+BATCH_GET_MAX_ATTEMPTS = 4
+BATCH_GET_BASE_DELAY_SECONDS = 0.05
+BATCH_GET_MAX_DELAY_SECONDS = 1.0
+
+def fetch_user_and_portfolio(email: str):
+    """Fetch the user and portfolio items for email in one BatchGetItem call.
+
+    Returns (user_item, portfolio_item); either is None when missing.
+    """
+    key = {'userId': email}
+    tables = {users_table.name: users_table, portfolios_table.name: portfolios_table}
+    request_items = {name: {'Keys': [key]} for name in tables}
+    items = {}
+    for attempt in range(BATCH_GET_MAX_ATTEMPTS):
+        if attempt:
+            delay = min(BATCH_GET_MAX_DELAY_SECONDS, BATCH_GET_BASE_DELAY_SECONDS * 2 ** attempt)
+            time.sleep(random.uniform(0, delay))
+        response = dynamodb.batch_get_item(RequestItems=request_items)
+        for table_name, table_items in response['Responses'].items():
+            if table_items:
+                items[table_name] = table_items[0]
+        request_items = response.get('UnprocessedKeys')
+        if not request_items:
+            break
+    else:
+        # Still throttled after every retry: read what's left one item at a time
+        print(f"⚠️  BatchGetItem left keys unprocessed after {BATCH_GET_MAX_ATTEMPTS} attempts, falling back to GetItem")
+        for table_name in request_items:
+            item = tables[table_name].get_item(Key=key).get('Item')
+            if item is not None:
+                items[table_name] = item
+    return items.get(users_table.name), items.get(portfolios_table.name)
 
 # ==================== HEALTH CHECK ====================
 
-@app.get("/")
-def read_root():
-    return {
-        "message": "WealthWise AI Robo-Advisor API (Strand-Powered)",
-        "status": "running",
-        "version": "4.0.0-strand",
-        "agents": {
-            "strand_sdk": {
-                "market": "Market Data Agent (Strand SDK)",
-                "portfolio": "Portfolio Analysis Agent (Strand SDK)",
-                "recommendation": "Recommendation Agent (Strand SDK)",
-                "risk": "Risk Analysis Agent (Strand SDK)",
-                "orchestrator": "Orchestrator Agent (Strand SDK)"
-            }
+# Both bodies are constant apart from the health timestamp, so serialize them
+# once at import and only splice the timestamp in per request
+ROOT_INFO = {
+    "message": "WealthWise AI Robo-Advisor API (Strand-Powered)",
+    "status": "running",
+    "version": "4.0.0-strand",
+    "agents": {
+        "strand_sdk": {
+            "market": "Market Data Agent (Strand SDK)",
+            "portfolio": "Portfolio Analysis Agent (Strand SDK)",
+            "recommendation": "Recommendation Agent (Strand SDK)",
+            "risk": "Risk Analysis Agent (Strand SDK)",
+            "orchestrator": "Orchestrator Agent (Strand SDK)"
+        }
+    },
+    "endpoints": {
+        "strand_sdk": {
+            "chat": "POST /api/chat",
+            "analysis": "GET /api/portfolio/{email}/analysis",
+            "marketReport": "GET /api/portfolio/{email}/market-report",
+            "recommendations": "GET /api/portfolio/{email}/recommendations",
+            "riskAnalysis": "GET /api/portfolio/{email}/risk-analysis",
+            "ask": "POST /api/portfolio/{email}/ask"
         },
-        "endpoints": {
-            "strand_sdk": {
-                "chat": "POST /api/chat",
-                "analysis": "GET /api/portfolio/{email}/analysis",
-                "marketReport": "GET /api/portfolio/{email}/market-report",
-                "recommendations": "GET /api/portfolio/{email}/recommendations",
-                "riskAnalysis": "GET /api/portfolio/{email}/risk-analysis",
-                "ask": "POST /api/portfolio/{email}/ask"
-            },
-            "core": {
-                "onboarding": "POST /api/onboarding/complete",
-                "login": "POST /api/auth/login",
-                "dashboard": "GET /api/portfolio/{email}/dashboard"
-            },
-            "qbusiness": {
-                "chat": "POST /api/qbusiness/chat",
-                "conversations": "GET /api/qbusiness/conversations"
-            }
+        "core": {
+            "onboarding": "POST /api/onboarding/complete",
+            "login": "POST /api/auth/login",
+            "dashboard": "GET /api/portfolio/{email}/dashboard"
+        },
+        "qbusiness": {
+            "chat": "POST /api/qbusiness/chat",
+            "conversations": "GET /api/qbusiness/conversations"
         }
     }
+}
+ROOT_RESPONSE_BODY = orjson.dumps(ROOT_INFO)
+
+HEALTH_BODY_PREFIX = b'{"status":"healthy","timestamp":"'
+HEALTH_BODY_SUFFIX = b'",' + orjson.dumps({
+    "service": "WealthWise AI Robo-Advisor (Strand)",
+    "version": "4.0.0"
+})[1:]
+
+@app.get("/")
+async def read_root():
+    return Response(
+        content=ROOT_RESPONSE_BODY,
+        media_type="application/json",
+        headers={'Cache-Control': STATIC_CACHE_CONTROL}
+    )
 
 @app.get("/health")
-def health_check():
-    return {
-        "status": "healthy",
-        "timestamp": datetime.now(timezone.utc).isoformat(),
-        "service": "WealthWise AI Robo-Advisor (Strand)",
-        "version": "4.0.0"
-    }
+async def health_check():
+    timestamp = datetime.now(timezone.utc).isoformat().encode()
+    return Response(
+        content=HEALTH_BODY_PREFIX + timestamp + HEALTH_BODY_SUFFIX,
+        media_type="application/json"
+    )
 
 # ==================== AUTH ENDPOINTS (Legacy - Unchanged) ====================
 
 @app.post("/api/auth/login")
 async def login(request: LoginRequest):
-    print(f"🔐 Login attempt for: {request.email}")
+    logger.info("🔐 Login attempt for: %s", request.email)
 
-    response = users_table.get_item(Key={'userId': request.email})
+    # User and portfolio come back from one request; the portfolio is discarded
+    # if the credentials don't check out or the user has none yet
+    user, portfolio_item = await run_in_threadpool(fetch_user_and_portfolio, request.email)
 
-    if 'Item' not in response:
+    if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials"
         )
 
-    user = response['Item']
-
-    if not verify_password(request.password, user['passwordHash']):
+    if not await run_in_threadpool(verify_password, request.password, user['passwordHash']):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials"
@@ -269,10 +664,8 @@ async def login(request: LoginRequest):
         del user['passwordHash']
 
     portfolio = None
-    if user.get('hasPortfolio'):
-        portfolio_response = portfolios_table.get_item(Key={'userId': request.email})
-        if 'Item' in portfolio_response:
-            portfolio = convert_decimal_to_float(portfolio_response['Item'])
+    if user.get('hasPortfolio') and portfolio_item is not None:
+        portfolio = convert_decimal_to_float(portfolio_item)
 
     return {
         'success': True,
@@ -284,16 +677,24 @@ async def login(request: LoginRequest):
 async def complete_onboarding(request: CompleteOnboardingRequest):
     user_email = request.userId
 
-    print(f"📝 Saving onboarding data for: {user_email}")
+    logger.info("📝 Saving onboarding data for: %s", user_email)
 
-    existing_user = users_table.get_item(Key={'userId': user_email})
-    if 'Item' in existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail="An account with this email already exists"
-        )
+    # One timestamp for both items' createdAt/updatedAt
+    now_iso = datetime.now(timezone.utc).isoformat()
 
-    password_hash = hash_password(request.password)
+    # Start hashing in the threadpool (bcrypt releases the GIL) and build the
+    # portfolio item while it runs
+    hash_task = asyncio.ensure_future(run_in_threadpool(hash_password, request.password))
+
+    # Serialize all portfolio fields in one pydantic pass, then convert once
+    portfolio_data = convert_float_to_decimal(request.model_dump(
+        include={'initialInvestment', 'cashSavings', 'bonds', 'stocks', 'etfs'}
+    ))
+    portfolio_data['userId'] = user_email
+    portfolio_data['createdAt'] = now_iso
+    portfolio_data['updatedAt'] = now_iso
+
+    password_hash = await hash_task
 
     user_data = {
         'userId': user_email,
@@ -306,24 +707,42 @@ async def complete_onboarding(request: CompleteOnboardingRequest):
         'investmentHorizon': request.investmentHorizon,
         'monthlyContribution': convert_float_to_decimal(request.monthlyContribution),
         'hasPortfolio': True,
-        'createdAt': datetime.now(timezone.utc).isoformat(),
-        'updatedAt': datetime.now(timezone.utc).isoformat()
+        'createdAt': now_iso,
+        'updatedAt': now_iso
     }
 
-    users_table.put_item(Item=user_data)
-
-    portfolio_data = {
-        'userId': user_email,
-        'initialInvestment': convert_float_to_decimal(request.initialInvestment),
-        'cashSavings': convert_float_to_decimal(request.cashSavings),
-        'bonds': convert_float_to_decimal([b.dict() for b in request.bonds]),
-        'stocks': convert_float_to_decimal([s.dict() for s in request.stocks]),
-        'etfs': convert_float_to_decimal([e.dict() for e in request.etfs]),
-        'createdAt': datetime.now(timezone.utc).isoformat(),
-        'updatedAt': datetime.now(timezone.utc).isoformat()
-    }
+    # Single atomic write for both items; the condition on the user put
+    # replaces the separate existence check
+    try:
+        await run_in_threadpool(
+            dynamodb.meta.client.transact_write_items,
+            TransactItems=[
+                {
+                    'Put': {
+                        'TableName': users_table.name,
+                        'Item': user_data,
+                        'ConditionExpression': 'attribute_not_exists(userId)'
+                    }
+                },
+                {
+                    'Put': {
+                        'TableName': portfolios_table.name,
+                        'Item': portfolio_data
+                    }
+                }
+            ]
+        )
+    except ClientError as e:
+        reasons = e.response.get('CancellationReasons', [])
+        if reasons and reasons[0].get('Code') == 'ConditionalCheckFailed':
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="An account with this email already exists"
+            )
+        raise
 
-    portfolios_table.put_item(Item=portfolio_data)
+    _user_cache.pop(user_email, None)
+    _portfolio_cache.pop(user_email, None)
 
     if 'passwordHash' in user_data:
         del user_data['passwordHash']
@@ -572,8 +991,8 @@ async def get_portfolio_analysis(email: str):
     print(f"🤖 [Portfolio Analysis] Request for {email}")
 
     try:
-        # Get market data using new market agent
-        market_data = market_agent.generate_report(email)
+        # Get market data using new market agent, plus the user profile
+        market_data, user_profile = await get_report_and_profile(email)
         
         if not market_data.get('success'):
             raise HTTPException(
@@ -582,7 +1001,7 @@ async def get_portfolio_analysis(email: str):
             )
 
         # Run portfolio analysis using new portfolio agent
-        analysis = portfolio_agent.analyze_portfolio(email, market_data)
+        analysis = await run_in_threadpool(portfolio_agent.analyze_portfolio, email, market_data, user_profile)
         
         if not analysis.get('success'):
             raise HTTPException(
@@ -603,6 +1022,8 @@ async def get_portfolio_analysis(email: str):
             }
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Portfolio analysis error: {e}")
         raise HTTPException(
@@ -647,9 +1068,18 @@ async def get_conversation_summary(email: str):
 # ==================== LEGACY ENDPOINTS (Unchanged for backward compatibility) ====================
 
 @app.get("/api/user/{email}")
-async def get_user(email: str):
+async def get_user(email: str, request: Request):
     """Get user profile by email"""
-    response = users_table.get_item(Key={'userId': email})
+    cached = cache_get(_user_cache, email)
+    if cached is not None:
+        return conditional_json_response(request, *cached)
+
+    response = await run_in_threadpool(
+        users_table.get_item,
+        Key={'userId': email},
+        ProjectionExpression=USER_PROJECTION_EXPRESSION,
+        ExpressionAttributeNames=USER_PROJECTION_NAMES
+    )
 
     if 'Item' not in response:
         raise HTTPException(
@@ -657,19 +1087,22 @@ async def get_user(email: str):
             detail="User not found"
         )
 
-    user = response['Item']
-    if 'passwordHash' in user:
-        del user['passwordHash']
-
-    return {
+    # Decimals are encoded by orjson's default hook, no float copy needed
+    body, etag = build_etag_body({
         'success': True,
-        'user': convert_decimal_to_float(user)
-    }
+        'user': response['Item']
+    })
+    cache_put(_user_cache, email, (body, etag))
+    return conditional_json_response(request, body, etag)
 
 @app.get("/api/portfolio/{email}")
-async def get_portfolio(email: str):
+async def get_portfolio(email: str, request: Request):
     """Get user portfolio by email"""
-    response = portfolios_table.get_item(Key={'userId': email})
+    cached = cache_get(_portfolio_cache, email)
+    if cached is not None:
+        return conditional_json_response(request, *cached)
+
+    response = await run_in_threadpool(portfolios_table.get_item, Key={'userId': email})
 
     if 'Item' not in response:
         raise HTTPException(
@@ -677,18 +1110,20 @@ async def get_portfolio(email: str):
             detail="Portfolio not found"
         )
 
-    return {
+    body, etag = build_etag_body({
         'success': True,
-        'portfolio': convert_decimal_to_float(response['Item'])
-    }
+        'portfolio': response['Item']
+    })
+    cache_put(_portfolio_cache, email, (body, etag))
+    return conditional_json_response(request, body, etag)
 
 @app.get("/api/portfolio/{email}/market-report")
 async def get_market_report(email: str):
     """Get enriched portfolio with live market data using Strand SDK"""
-    print(f"📊 Market report requested for: {email}")
+    logger.info("📊 Market report requested for: %s", email)
 
     try:
-        report = market_agent.generate_report(email)
+        report = await get_market_report_cached(email)
 
         if not report['success']:
             raise HTTPException(
@@ -696,14 +1131,16 @@ async def get_market_report(email: str):
                 detail=report.get('error', 'Failed to generate market report')
             )
 
-        report['metadata'] = {
-            'apiVersion': '5.0.0-strand-sdk',
-            'agent': 'MarketDataAgent (Strand SDK)',
-            'timestamp': datetime.now(timezone.utc).isoformat()
+        # Copy before adding metadata; the report object is shared via the cache
+        return {
+            **report,
+            'metadata': {
+                'apiVersion': '5.0.0-strand-sdk',
+                'agent': 'MarketDataAgent (Strand SDK)',
+                'timestamp': datetime.now(timezone.utc).isoformat()
+            }
         }
 
-        return report
-
     except HTTPException:
         raise
     except Exception as e:
@@ -717,11 +1154,11 @@ async def get_market_report(email: str):
 @app.get("/api/portfolio/{email}/dashboard")
 async def get_complete_dashboard(email: str):
     """Complete dashboard using Strand SDK agents"""
-    print(f"📊 Complete dashboard requested for: {email}")
+    logger.info("📊 Complete dashboard requested for: %s", email)
 
     try:
-        # Get market data
-        market_report = market_agent.generate_report(email)
+        # Get market data and the user profile
+        market_report, user_profile = await get_report_and_profile(email)
 
         if not market_report['success']:
             raise HTTPException(
@@ -730,7 +1167,7 @@ async def get_complete_dashboard(email: str):
             )
 
         # Get portfolio analysis
-        analysis = portfolio_agent.analyze_portfolio(email, market_report)
+        analysis = await run_in_threadpool(portfolio_agent.analyze_portfolio, email, market_report, user_profile)
 
         if not analysis['success']:
             raise HTTPException(
@@ -755,7 +1192,7 @@ async def get_complete_dashboard(email: str):
                 'healthGrade': analysis['portfolioHealth']['grade'],
                 'modelPortfolio': analysis['modelPortfolio']['name'],
                 'drift': analysis['allocationAnalysis']['drift'],
-                'topRecommendations': len([r for r in analysis['recommendations'] if r.get('priority') == 'HIGH'])
+                'topRecommendations': sum(1 for r in analysis['recommendations'] if r.get('priority') == 'HIGH')
             },
             'metadata': {
                 'version': '5.0.0-strand-sdk',
@@ -774,34 +1211,52 @@ async def get_complete_dashboard(email: str):
 @app.put("/api/portfolio/{email}")
 async def update_portfolio(email: str, portfolio_updates: Dict[str, Any]):
     """Update user portfolio"""
-    response = portfolios_table.get_item(Key={'userId': email})
+    # Build a single SET expression so the update is one conditional write
+    # instead of a get_item + put_item round trip
+    set_clauses = ['#updatedAt = :updatedAt']
+    names = {'#updatedAt': 'updatedAt'}
+    values = {':updatedAt': datetime.now(timezone.utc).isoformat()}
+
+    for i, (key, value) in enumerate(portfolio_updates.items()):
+        if key in ('userId', 'updatedAt'):
+            continue
+        set_clauses.append(f'#k{i} = :v{i}')
+        names[f'#k{i}'] = key
+        values[f':v{i}'] = convert_float_to_decimal(value)
 
-    if 'Item' not in response:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Portfolio not found"
+    try:
+        response = await run_in_threadpool(
+            portfolios_table.update_item,
+            Key={'userId': email},
+            UpdateExpression='SET ' + ', '.join(set_clauses),
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=values,
+            ConditionExpression='attribute_exists(userId)',
+            ReturnValues='ALL_NEW'
         )
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Portfolio not found"
+            )
+        raise
 
-    existing_portfolio = response['Item']
-    for key, value in portfolio_updates.items():
-        if key != 'userId':
-            existing_portfolio[key] = convert_float_to_decimal(value)
-
-    existing_portfolio['updatedAt'] = datetime.now(timezone.utc).isoformat()
-
-    portfolios_table.put_item(Item=existing_portfolio)
+    _portfolio_cache.pop(email, None)
+    invalidate_market_report(email)
 
     return {
         'success': True,
         'message': 'Portfolio updated successfully',
-        'portfolio': convert_decimal_to_float(existing_portfolio)
+        'portfolio': convert_decimal_to_float(response['Attributes'])
     }
 
 # ==================== STATS ENDPOINTS ====================
 
 @app.get("/api/market-data/stats")
-async def get_api_stats():
+async def get_api_stats(http_response: Response):
     """Get statistics about market data API usage"""
+    http_response.headers['Cache-Control'] = STATIC_CACHE_CONTROL
     return {
         'success': True,
         'agent': 'MarketDataAgent (Strand SDK)',
@@ -846,7 +1301,11 @@ async def get_risk_analysis(email: str):
     try:
         # Use the function directly instead of agent method
         # Need to pass DynamoDB tables to the function
-        result = analyze_user_risk_profile(email, users_table, portfolios_table)
+        result = await run_in_threadpool(analyze_user_risk_profile, email, users_table, portfolios_table)
+
+        # The agent writes riskAnalysis onto the user item, so the cached
+        # /api/user body (and its ETag) is stale now
+        _user_cache.pop(email, None)
 
         if not result['success']:
             raise HTTPException(
@@ -884,28 +1343,26 @@ async def get_recommendations(email: str):
     print(f"💡 [AI Recommendations with XAI] Generating for {email}")
     
     try:
-        # 1. Fetch user data from DynamoDB
-        print(f"📥 Fetching user profile for {email}")
-        user_response = users_table.get_item(Key={'userId': email})
-        if 'Item' not in user_response:
+        # 1-2. Fetch user profile and portfolio from DynamoDB in one batch
+        print(f"📥 Fetching user profile and portfolio for {email}")
+        generation = _portfolio_write_generation
+        user_item, portfolio_item = await run_in_threadpool(fetch_user_and_portfolio, email)
+        if user_item is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"User not found: {email}"
             )
         
-        user = convert_decimal_to_float(user_response['Item'])
+        user = convert_decimal_to_float(user_item)
         print(f"✅ User profile loaded: {user.get('name', 'N/A')}, Age: {user.get('age', 'N/A')}")
         
-        # 2. Fetch portfolio data from DynamoDB
-        print(f"📥 Fetching portfolio for {email}")
-        portfolio_response = portfolios_table.get_item(Key={'userId': email})
-        if 'Item' not in portfolio_response:
+        if portfolio_item is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Portfolio not found for user: {email}"
             )
         
-        portfolio = convert_decimal_to_float(portfolio_response['Item'])
+        portfolio = convert_decimal_to_float(portfolio_item)
         
         # Calculate portfolio summary for logging
         total_stocks = len(portfolio.get('stocks', []))
@@ -919,7 +1376,7 @@ async def get_recommendations(email: str):
         print(f"📊 Fetching market data using Strand SDK market agent...")
         market_data = None
         try:
-            market_report = market_agent.generate_report(email)
+            market_report = await get_market_report_cached(email, portfolio_item, generation)
             
             if market_report.get('success'):
                 # Extract relevant market context for recommendations
@@ -952,20 +1409,12 @@ async def get_recommendations(email: str):
         
         print(f"🤖 Generating recommendations using Strand SDK recommendation agent...")
         
-        # Use the function directly instead of agent method
-        # Need to get user profile and portfolio data first
-        user_response = users_table.get_item(Key={'userId': email})
-        portfolio_response = portfolios_table.get_item(Key={'userId': email})
-        
-        if 'Item' not in user_response or 'Item' not in portfolio_response:
-            raise HTTPException(status_code=404, detail="User or portfolio not found")
-        
-        user_profile = convert_decimal_to_float(user_response['Item'])
-        portfolio = convert_decimal_to_float(portfolio_response['Item'])
-        
-        result = generate_ai_recommendations(
+        # Use the function directly instead of agent method,
+        # reusing the user profile and portfolio loaded in steps 1-2
+        result = await run_in_threadpool(
+            generate_ai_recommendations,
             user_email=email,
-            user_profile=user_profile,
+            user_profile=user,
             portfolio=portfolio,
             market_data=market_data
         )
@@ -1052,4 +1501,17 @@ if __name__ == "__main__":
     print("✅ ALL ENDPOINTS: Now powered by Strand SDK agents")
     print("=" * 60)
     print()
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # Conversation history and the read caches live in process memory, so
+    # keep one worker unless UVICORN_WORKERS (or the conventional
+    # WEB_CONCURRENCY) is raised deliberately. loop and http stay on "auto",
+    # which picks uvloop/httptools when they're installed.
+    workers = int(os.getenv("UVICORN_WORKERS") or os.getenv("WEB_CONCURRENCY") or "1")
+    uvicorn.run(
+        "server:app" if workers > 1 else app,
+        host="0.0.0.0",
+        port=8000,
+        workers=workers,
+        loop="auto",
+        http="auto",
+        access_log=os.getenv("UVICORN_ACCESS_LOG", "true").lower() == "true"
+    )
\ No newline at end of file
@@ -1,6 +1,5 @@
 import boto3
 from typing import Dict, Optional
-from decimal import Decimal
 
 
 class SmartQBusinessService:
@@ -65,19 +64,18 @@ class SmartQBusinessService:
                 print(f"👋 Query classified as GREETING")
                 return 'greeting'
         
-        # Check for personal keywords
-        personal_score = sum(1 for keyword in self.personal_keywords 
-                           if keyword in query_lower)
+        # Check for personal keywords (first match decides, no need to score them all)
+        personal_match = next((keyword for keyword in self.personal_keywords 
+                               if keyword in query_lower), None)
+        if personal_match:
+            print(f"🎯 Query classified as PERSONAL (matched: '{personal_match}')")
+            return 'personal'
         
         # Check for general keywords
-        general_score = sum(1 for keyword in self.general_keywords 
-                          if keyword in query_lower)
-        
-        if personal_score > 0:
-            print(f"🎯 Query classified as PERSONAL (score: {personal_score})")
-            return 'personal'
-        elif general_score > 0:
-            print(f"📚 Query classified as GENERAL (score: {general_score})")
+        general_match = next((keyword for keyword in self.general_keywords 
+                              if keyword in query_lower), None)
+        if general_match:
+            print(f"📚 Query classified as GENERAL (matched: '{general_match}')")
             return 'general'
         else:
             print(f"❓ Query ambiguous, defaulting to GENERAL")
@@ -104,29 +102,29 @@ class SmartQBusinessService:
             etfs = portfolio.get('etfs', [])
             cash = float(portfolio.get('cashSavings', 0))
             
-            stock_value = sum(float(s.get('quantity', 0)) * float(s.get('avgPrice', 0)) 
-                            for s in stocks)
-            bond_value = sum(float(b.get('quantity', 0)) * float(b.get('avgPrice', 0)) 
-                           for b in bonds)
-            etf_value = sum(float(e.get('quantity', 0)) * float(e.get('avgPrice', 0)) 
-                          for e in etfs)
-            total_value = stock_value + bond_value + etf_value + cash
-            
-            # Format holdings
+            # Value each holding and format it in the same pass
             holdings_text = []
+            stock_value = 0.0
             for stock in stocks:
+                avg_price = float(stock.get('avgPrice', 0))
+                stock_value += float(stock.get('quantity', 0)) * avg_price
                 holdings_text.append(
                     f"  • {stock.get('symbol', 'N/A')}: {stock.get('quantity', 0)} shares @ "
-                    f"₹{float(stock.get('avgPrice', 0)):.2f}"
+                    f"₹{avg_price:.2f}"
                 )
+            bond_value = 0.0
             for bond in bonds:
+                bond_value += float(bond.get('quantity', 0)) * float(bond.get('avgPrice', 0))
                 holdings_text.append(
                     f"  • {bond.get('symbol', 'N/A')} (Bond): {bond.get('quantity', 0)} units"
                 )
+            etf_value = 0.0
             for etf in etfs:
+                etf_value += float(etf.get('quantity', 0)) * float(etf.get('avgPrice', 0))
                 holdings_text.append(
                     f"  • {etf.get('symbol', 'N/A')} (ETF): {etf.get('quantity', 0)} units"
                 )
+            total_value = stock_value + bond_value + etf_value + cash
             
             # Risk analysis
             risk_analysis = user.get('riskAnalysis', {})
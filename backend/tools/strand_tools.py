@@ -5,8 +5,8 @@ These tools allow Strand agents to interact with your existing
 market data and portfolio analysis infrastructure.
 """
 
-from typing import Dict, Any, Optional
-import json
+from functools import cached_property
+from typing import Dict, Any
 # Updated to use new Strands SDK agents
 from agents.market_agent import create_market_agent
 from agents.portfolio_agent import create_portfolio_agent
@@ -73,8 +73,9 @@ class MarketDataTool:
                 'error': str(e)
             }
     
-    def to_strand_tool(self):
-        """Convert to Strand SDK tool format"""
+    @cached_property
+    def strand_tool(self) -> Dict[str, Any]:
+        """Strand SDK tool spec, built once per tool instance"""
         return {
             'name': self.name,
             'description': self.description,
@@ -87,6 +88,10 @@ class MarketDataTool:
                 }
             }
         }
+    
+    def to_strand_tool(self):
+        """Convert to Strand SDK tool format"""
+        return self.strand_tool
 
 
 class PortfolioAnalysisTool:
@@ -160,8 +165,9 @@ class PortfolioAnalysisTool:
                 'error': str(e)
             }
     
-    def to_strand_tool(self):
-        """Convert to Strand SDK tool format"""
+    @cached_property
+    def strand_tool(self) -> Dict[str, Any]:
+        """Strand SDK tool spec, built once per tool instance"""
         return {
             'name': self.name,
             'description': self.description,
@@ -179,6 +185,10 @@ class PortfolioAnalysisTool:
                 }
             }
         }
+    
+    def to_strand_tool(self):
+        """Convert to Strand SDK tool format"""
+        return self.strand_tool
 
 
 class UserProfileTool:
@@ -265,8 +275,9 @@ class UserProfileTool:
             return [self._convert_decimal_to_float(item) for item in obj]
         return obj
     
-    def to_strand_tool(self):
-        """Convert to Strand SDK tool format"""
+    @cached_property
+    def strand_tool(self) -> Dict[str, Any]:
+        """Strand SDK tool spec, built once per tool instance"""
         return {
             'name': self.name,
             'description': self.description,
@@ -279,6 +290,10 @@ class UserProfileTool:
                 }
             }
         }
+    
+    def to_strand_tool(self):
+        """Convert to Strand SDK tool format"""
+        return self.strand_tool
 
 
 # Factory function to create all tools